@@ -5,13 +5,16 @@ import sys
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 sys.path.append(BASE_DIR)
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
 from database import SessionLocal
 from app.schemas.schemas import Category as CategorySchema, CategoryCreate
 from app.crud.category_crud import *
+from app.crud.pagination import PageParams, set_next_cursor
+from app.crud.data_version import catalog_stamp
+from app.crud.etag import make_etag, not_modified
 
 router = APIRouter(
     prefix="/categories",
@@ -30,8 +33,13 @@ def create_new_category(cat_in: CategoryCreate, db: Session = Depends(get_db)):
     return create_category(db, cat_in)
 
 @router.get("/categories/", response_model=List[CategorySchema])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return list_categories(db)
+def read_categories(request: Request, response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    unchanged = not_modified(request, response, make_etag(request, catalog_stamp(db)))
+    if unchanged:
+        return unchanged
+    categories, next_cursor = list_categories(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return categories
 
 @router.get("/categories/{category_id}", response_model=CategorySchema)
 def read_category(category_id: int, db: Session = Depends(get_db)):
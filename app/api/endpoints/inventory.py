@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from database import SessionLocal
+from datetime import datetime
+from typing import List, Optional
+from database import SessionLocal, AsyncSessionLocal
 from app.crud.inventory_crud import *
-from app.schemas.schemas import Inventory as InventorySchema, InventoryCreate, InventoryHistory as InventoryHistorySchema
+from app.schemas.schemas import Inventory as InventorySchema, InventoryAsOf, InventoryCreate, InventoryHistory as InventoryHistorySchema
 from app.crud.product_crud import get_product
+from app.crud.pagination import PageParams, set_next_cursor
+from app.crud.export import ExportFormat, export_response
+from app.crud.etag import make_etag, not_modified
+from app.crud.data_version import catalog_stamp_async
+from app.crud.low_stock_events import low_stock_broker
+import asyncio
+import json
 from app.api.endpoints.users import Isadmin
 
+SSE_KEEPALIVE_SECONDS = 15
+
 router = APIRouter(prefix="/inventory", tags=["Inventory"])
 
 def get_db():
@@ -16,28 +28,69 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @router.get("/", response_model=List[InventorySchema])
-def read_inventory(db: Session = Depends(get_db)):
-    return list_inventory(db)
+async def read_inventory(request: Request, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # Rows embed their product and category, so catalog writes change the tag too
+    unchanged = not_modified(request, response, make_etag(request, await catalog_stamp_async(db), await inventory_stamp_async(db)))
+    if unchanged:
+        return unchanged
+    inventory, next_cursor = await list_inventory_async(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return inventory
 
 @router.get("/low-stock", response_model=List[InventorySchema])
-def read_low_stock(db: Session = Depends(get_db)):
-    return list_low_stock(db)
+async def read_low_stock(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    inventory, next_cursor = await list_low_stock_async(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return inventory
+
+@router.get("/low-stock/stream", summary="Server-sent events for low-stock transitions")
+async def stream_low_stock(request: Request):
+    async def events():
+        subscriber = low_stock_broker.subscribe()
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber[1].get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: low-stock\ndata: {json.dumps(event)}\n\n"
+        finally:
+            low_stock_broker.unsubscribe(subscriber)
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/as-of", response_model=List[InventoryAsOf])
+async def read_inventory_as_of(response: Response, ts: datetime = Query(..., description="point in time (UTC) to report stock at"), page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    stock, next_cursor = await inventory_as_of_async(db, ts, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return stock
 
 @router.get("/{product_id}", response_model=InventorySchema)
-def read_inventory_by_product(product_id: int, db: Session = Depends(get_db)):
-    inv = get_inventory(db, product_id)
+async def read_inventory_by_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    inv = await get_inventory_async(db, product_id)
     if not inv:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found")
     return inv
 
 @router.get("/history/", response_model=List[InventoryHistorySchema])
-def read_inventory_history(db: Session = Depends(get_db)):
-    return list_inventory_history(db)
+async def read_inventory_history(response: Response, format: Optional[ExportFormat] = Query(None, description="stream every row as ndjson or csv instead of a page"), page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    if format is not None:
+        return export_response(format, stream_inventory_history, "inventory_history")
+    history, next_cursor = await list_inventory_history_async(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return history
 
 @router.get("/history/{product_id}", response_model=List[InventoryHistorySchema])
-def read_inventory_history_by_product(product_id: int, db: Session = Depends(get_db)):
-    return get_inventory_history(db, product_id)
+async def read_inventory_history_by_product(product_id: int, response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    history, next_cursor = await get_inventory_history_async(db, product_id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return history
 
 @router.post("/", response_model=InventorySchema, status_code=status.HTTP_201_CREATED)
 def add_inventory(inv_in: InventoryCreate, db: Session = Depends(get_db)):
@@ -50,14 +103,15 @@ def add_inventory(inv_in: InventoryCreate, db: Session = Depends(get_db)):
     return create_inventory(db, inv_in)
     
 @router.put("/{product_id}", response_model=InventorySchema)
-def adjust_inventory(product_id: int, change_qty: int, reason: str, db: Session = Depends(get_db)):
-    product = get_product(db, product_id)
-    if not product:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    inv = get_inventory(db, product_id)
+def adjust_inventory(product_id: int, change_qty: int, reason: str, allow_negative: bool = True, db: Session = Depends(get_db)):
+    inv, hist = update_inventory(db, product_id, change_qty, reason, allow_negative)
     if not inv:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found")
-    inv, hist = update_inventory(db, product_id, change_qty, reason)
+        # Only the failure path pays for the lookups that explain why nothing was updated
+        if not get_product(db, product_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        if not get_inventory(db, product_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Insufficient stock")
     return inv
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,41 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from database import async_pool, engine
+from app.crud.metrics import async_pool_metrics, pool_metrics, route_metrics
+from app.crud.auth_cache import principal_cache
+from app.crud.catalog_cache import catalog_cache
+from app.crud.sales_engine import sales_engine
+from app.crud.leaderboard import leaderboards
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("", response_class=PlainTextResponse, summary="Prometheus metrics")
+def prometheus_metrics():
+    return PlainTextResponse(route_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/db-pool")
+def db_pool_stats():
+    # Reported separately so each pool can be sized from its own wait and hold times
+    return {"sync": pool_metrics.snapshot(engine.pool), "async": async_pool_metrics.snapshot(async_pool())}
+
+@router.get("/auth-cache")
+def auth_cache_stats():
+    return principal_cache.stats()
+
+
+@router.get("/catalog-cache")
+def catalog_cache_stats():
+    return catalog_cache.stats()
+
+
+@router.get("/sales-engine")
+def sales_engine_stats():
+    return sales_engine.stats()
+
+
+@router.get("/leaderboards")
+def leaderboard_stats():
+    return leaderboards.stats()
@@ -5,7 +5,7 @@ import sys
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 sys.path.append(BASE_DIR)
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -13,6 +13,9 @@ from database import SessionLocal
 from app.crud.product_crud import *
 from app.schemas.schemas import Product as ProductSchema, ProductCreate, Category
 from app.crud.category_crud import get_category
+from app.crud.pagination import PageParams, set_next_cursor
+from app.crud.data_version import catalog_stamp
+from app.crud.etag import make_etag, not_modified
 
 router = APIRouter(
     prefix="/products",
@@ -35,8 +38,13 @@ def create_new_product(product_in: ProductCreate, db: Session = Depends(get_db))
     return create_product(db, product_in)
 
 @router.get("/", response_model=List[ProductSchema])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return list_products(db, skip=skip, limit=limit)
+def read_products(request: Request, response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    unchanged = not_modified(request, response, make_etag(request, catalog_stamp(db)))
+    if unchanged:
+        return unchanged
+    products, next_cursor = list_products(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return products
 
 @router.get("/{product_id}", response_model=ProductSchema)
 def read_product(product_id: int, db: Session = Depends(get_db)):
@@ -46,8 +54,10 @@ def read_product(product_id: int, db: Session = Depends(get_db)):
     return prod
 
 @router.get("/category/{category_id}", response_model=List[ProductSchema])
-def read_products_by_category(category_id: int, db: Session = Depends(get_db)):
-    return get_product_by_category(db, category_id)
+def read_products_by_category(category_id: int, response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    products, next_cursor = get_product_by_category(db, category_id, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return products
     
 @router.put("/products/{product_id}", response_model=ProductSchema)
 def update_existing_product(product_id: int, product_in: ProductCreate, db: Session = Depends(get_db)):
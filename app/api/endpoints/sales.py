@@ -1,12 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import date
-from typing import List, Dict
-from database import SessionLocal
+from typing import List, Optional, Tuple, Union
+from database import SessionLocal, AsyncSessionLocal
 from app.crud.sale_crud import *
 from app.crud.product_crud import get_product
-from app.schemas.schemas import SaleCreate, Sale, RevenueByCategory, RevenueByPeriod, RevenueByProduct
+from app.crud.pagination import PageParams, set_next_cursor
+from app.crud.export import ExportFormat, export_response
+from app.crud.etag import make_etag, not_modified
+from app.crud.fast_json import FAST_JSON_RESPONSES, fast_json
+from app.crud.leaderboard import LEADERBOARD_WINDOWS
+from app.crud.revenue_series import series_points
+from app.schemas.schemas import SaleCreate, Sale, SaleBulkCreate, SaleBulkError, SaleBulkResult, RevenueByCategory, RevenueByPeriod, RevenueByProduct, RevenueComparison, RevenueInterval, RevenueSeriesPoint, SalesDistribution, TopSeller
 from app.api.endpoints.users import Isadmin
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+MAX_BULK_SALES = int(os.getenv("MAX_BULK_SALES", 10000))
+MAX_COMPARE_INTERVALS = int(os.getenv("MAX_COMPARE_INTERVALS", 48))
+MAX_ROLLING_WINDOW = int(os.getenv("MAX_ROLLING_WINDOW", 366))
+MAX_SERIES_POINTS = int(os.getenv("MAX_SERIES_POINTS", 5000))
+MAX_TOP_N = int(os.getenv("MAX_TOP_N", 100))
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
@@ -17,6 +34,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @router.post("/", response_model=Sale, status_code=status.HTTP_201_CREATED)
 def create_new_sale(sale_in: SaleCreate, db: Session = Depends(get_db)):
     if Isadmin(sale_in.token, db):
@@ -25,12 +46,76 @@ def create_new_sale(sale_in: SaleCreate, db: Session = Depends(get_db)):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
         return create_sale(db, sale_in)
 
+@router.post("/bulk", response_model=SaleBulkResult, status_code=status.HTTP_201_CREATED)
+def create_sales_in_bulk(bulk_in: SaleBulkCreate, db: Session = Depends(get_db)):
+    if len(bulk_in.sales) > MAX_BULK_SALES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {MAX_BULK_SALES} sales per request")
+    if Isadmin(bulk_in.token, db):
+        inserted, errors = create_sales_bulk(db, bulk_in.sales)
+        return SaleBulkResult(inserted=inserted, errors=[SaleBulkError(index=i, detail=d) for i, d in errors])
+
 @router.get("/", response_model=List[RevenueByProduct])
-def read_sales(db: Session = Depends(get_db)):
-    rows = list_sales(db)
-    return [RevenueByProduct(product=pro, category=cat, units_sold=int(units),revenue=float(rev)) for pro, cat, units, rev in rows]
+def read_sales(response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    rows, next_cursor = list_sales(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, [{"product": pro, "category": cat, "units_sold": int(units), "revenue": float(rev)} for pro, cat, units, rev, _ in rows])
+    return [RevenueByProduct(product=pro, category=cat, units_sold=int(units),revenue=float(rev)) for pro, cat, units, rev, _ in rows]
     
 
+@router.get("/top", response_model=List[TopSeller], summary="Best-selling products or categories")
+def read_top_sellers(
+    response: Response,
+    by: str = Query("revenue", description="rank by revenue or units"),
+    n: int = Query(10, ge=1, le=MAX_TOP_N),
+    group: str = Query("product", description="rank products or categories"),
+    window: Optional[str] = Query(None, description=f"one of {', '.join(LEADERBOARD_WINDOWS)}, served from memory; the default when start and end are not given"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    if by not in ("revenue", "units"):
+        raise HTTPException(status_code=400, detail="by must be revenue or units")
+    if group not in ("product", "category"):
+        raise HTTPException(status_code=400, detail="group must be product or category")
+    if (start is None) != (end is None):
+        raise HTTPException(status_code=400, detail="Give both start and end, or neither")
+    if start is not None and window is not None:
+        raise HTTPException(status_code=400, detail="Give either a window or start and end")
+    if start is not None:
+        rows = top_sellers(db, by, group, n, start, end, category_id)
+    else:
+        window = window or "7d"
+        if window not in LEADERBOARD_WINDOWS:
+            raise HTTPException(status_code=400, detail="Invalid window")
+        rows = top_sellers_window(db, window, by, group, n, category_id)
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, [{"id": row_id, "name": name, "category": cat, "units_sold": int(units), "revenue": float(rev)} for row_id, name, cat, units, rev in rows])
+    return [TopSeller(id=row_id, name=name, category=cat, units_sold=int(units), revenue=float(rev)) for row_id, name, cat, units, rev in rows]
+
+@router.get("/distribution", response_model=List[SalesDistribution], response_model_exclude_unset=True, summary="Order size and value percentiles")
+async def get_sales_distribution(
+    request: Request,
+    response: Response,
+    start: date = Query(...),
+    end: date = Query(...),
+    group: str = Query("total", description="one of total, day, category"),
+    category_id: Optional[int] = Query(None, description="only sales of this category"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if start > end:
+        raise HTTPException(status_code=400, detail="start is after end")
+    if group not in DISTRIBUTION_GROUPS:
+        raise HTTPException(status_code=400, detail="Invalid group")
+    unchanged = not_modified(request, response, make_etag(request, await sales_stamp_async(db)))
+    if unchanged:
+        return unchanged
+    distribution = await sales_distribution_async(db, start, end, group, category_id)
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, distribution)
+    return distribution
+
 @router.get("/{sale_id}", response_model=Sale)
 def read_sale(sale_id: int, db: Session = Depends(get_db)):
     sale = get_sale(db, sale_id)
@@ -39,33 +124,124 @@ def read_sale(sale_id: int, db: Session = Depends(get_db)):
     return sale
 
 @router.get("/revenue/", response_model=List[RevenueByPeriod], summary="Revenue by period")
-def get_revenue(period: str = Query(..., description="one of day, week, month, year"), start: date = Query(...), end: date = Query(...),db: Session = Depends(get_db)):
+async def get_revenue(request: Request, response: Response, period: str = Query(..., description="one of day, week, month, year"), start: date = Query(...), end: date = Query(...),db: AsyncSession = Depends(get_async_db)):
+    unchanged = not_modified(request, response, make_etag(request, await sales_stamp_async(db)))
+    if unchanged:
+        return unchanged
     try:
-        data = revenue_by_period(db, period, start, end)
+        data = await revenue_by_period_async(db, period, start, end)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid period")
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, [{"period": str(p), "revenue": float(r)} for p, r in data])
     return [RevenueByPeriod(period= str(p), revenue= float(r)) for p, r in data]
 
-@router.get("/revenue/compare", response_model=Dict[str, float], summary="Compare revenue periods")
-def compare_revenue(start1: date = Query(...), end1: date = Query(...), start2: date = Query(...), end2: date = Query(...), db: Session = Depends(get_db)):
-    return revenue_comparison(db, start1, end1, start2, end2)
+@router.get("/revenue/series", response_model=List[RevenueSeriesPoint], response_model_exclude_unset=True, summary="Gap-filled revenue series")
+async def get_revenue_series(
+    request: Request,
+    response: Response,
+    period: str = Query(..., description="one of day, week, month; whole periods labelled by their first day (weeks as in /sales/revenue/: MySQL WEEK() mode 0, starting on Sunday and split at January 1st)"),
+    start: date = Query(...),
+    end: date = Query(...),
+    rolling: Optional[int] = Query(None, ge=1, le=MAX_ROLLING_WINDOW, description="add the trailing mean over this many periods"),
+    cumulative: bool = Query(False, description="add the running total from start"),
+    yoy: bool = Query(False, description="add the same period a year earlier (364 days, the same week number or 12 months) and the change in percent"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if start > end:
+        raise HTTPException(status_code=400, detail="start is after end")
+    try:
+        points = series_points(period, start, end, rolling, yoy)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid period")
+    if points > MAX_SERIES_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_POINTS} periods per series, rolling and yoy lookback included")
+    unchanged = not_modified(request, response, make_etag(request, await sales_stamp_async(db)))
+    if unchanged:
+        return unchanged
+    try:
+        series = await revenue_series_async(db, period, start, end, rolling, cumulative, yoy)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid period")
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, series)
+    return series
+
+def _parse_interval(value: str) -> Tuple[date, date]:
+    try:
+        start, end = (date.fromisoformat(part.strip()) for part in value.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid interval '{value}', expected YYYY-MM-DD,YYYY-MM-DD")
+    if start > end:
+        raise HTTPException(status_code=400, detail=f"Invalid interval '{value}', start is after end")
+    return start, end
+
+@router.get("/revenue/compare", response_model=Union[List[RevenueInterval], RevenueComparison], summary="Compare revenue periods")
+async def compare_revenue(
+    interval: List[str] = Query([], description="repeatable, 'start,end' e.g. 2025-01-01,2025-01-31"),
+    baseline: List[str] = Query([], description="optional, one 'start,end' per interval to compare it against (e.g. the same month last year)"),
+    start1: Optional[date] = None, end1: Optional[date] = None, start2: Optional[date] = None, end2: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    legacy = (start1, end1, start2, end2)
+    if any(value is not None for value in legacy):
+        # The original two-period form keeps its original response for existing callers
+        if not all(value is not None for value in legacy):
+            raise HTTPException(status_code=400, detail="start1, end1, start2 and end2 go together")
+        if interval or baseline:
+            raise HTTPException(status_code=400, detail="Use either interval/baseline or start1..end2, not both")
+        period1, period2 = await revenue_comparison_async(db, [(start1, end1), (start2, end2)])
+        return RevenueComparison(period1=period1, period2=period2)
+
+    intervals = [_parse_interval(value) for value in interval]
+    baselines = [_parse_interval(value) for value in baseline]
+    if not intervals:
+        raise HTTPException(status_code=400, detail="At least one interval is required")
+    if baselines and len(baselines) != len(intervals):
+        raise HTTPException(status_code=400, detail="Give one baseline per interval, or none")
+    if len(intervals) + len(baselines) > MAX_COMPARE_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPARE_INTERVALS} intervals per request")
+
+    totals = await revenue_comparison_async(db, intervals + baselines)
+    revenues, baseline_revenues = totals[:len(intervals)], totals[len(intervals):]
+    result = []
+    for i, ((start, end), revenue) in enumerate(zip(intervals, revenues)):
+        item = RevenueInterval(start=start, end=end, revenue=revenue)
+        if baselines:
+            (item.baseline_start, item.baseline_end), item.baseline_revenue = baselines[i], baseline_revenues[i]
+        elif i > 0:
+            # Without baselines each interval is compared with the one before it
+            item.baseline_start, item.baseline_end, item.baseline_revenue = result[i - 1].start, result[i - 1].end, revenues[i - 1]
+        if item.baseline_revenue is not None:
+            item.delta = revenue - item.baseline_revenue
+            item.delta_pct = item.delta / item.baseline_revenue * 100 if item.baseline_revenue else None
+        result.append(item)
+    return result
 
 @router.get("/revenue/category", response_model=List[RevenueByCategory], summary="Revenue by period and category")
-def revenue_by_period_and_category(start: date = Query(...), end: date = Query(...), db: Session = Depends(get_db)):
-    rows = sales_by_period_category(db, start, end)
+async def revenue_by_period_and_category(start: date = Query(...), end: date = Query(...), db: AsyncSession = Depends(get_async_db)):
+    rows = await sales_by_period_category_async(db, start, end)
     return [RevenueByCategory(category=cat, units_sold=int(units),revenue=float(rev)) for cat, units, rev in rows]
 
 @router.get("/range/", response_model=List[Sale], summary="Sales in date range")
-def sales_in_range(start: date = Query(...), end: date = Query(...), db: Session = Depends(get_db)):
-    return get_sales_by_date_range(db, start, end)
+def sales_in_range(response: Response, start: date = Query(...), end: date = Query(...), format: Optional[ExportFormat] = Query(None, description="stream every row as ndjson or csv instead of a page"), page: PageParams = Depends(), db: Session = Depends(get_db)):
+    if format is not None:
+        return export_response(format, lambda export_db: stream_sales_by_date_range(export_db, start, end), f"sales_{start}_{end}")
+    sales, next_cursor = get_sales_by_date_range(db, start, end, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return sales
 
 @router.get("/product/", response_model=List[RevenueByProduct], summary="Sales in specific Product")
-def sales_in_product(product_id: int, start: date = Query(...), end: date = Query(...), db: Session = Depends(get_db)):
-    rows = get_sales_by_product(db, start, end, product_id)
+async def sales_in_product(response: Response, product_id: int, start: date = Query(...), end: date = Query(...), db: AsyncSession = Depends(get_async_db)):
+    rows = await get_sales_by_product_async(db, start, end, product_id)
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, [{"product": pro, "category": cat, "units_sold": int(units), "revenue": float(rev)} for pro, cat, units, rev in rows])
     return [RevenueByProduct(product=pro, category=cat, units_sold=int(units),revenue=float(rev)) for pro, cat, units, rev in rows]
     
 @router.get("/category/", response_model=List[RevenueByCategory], summary="Sales in specific Category")
-def sales_in_category(category_id: int, start: date = Query(...), end: date = Query(...), db: Session = Depends(get_db)):
-    rows = get_sales_by_category(db, start, end, category_id)
+async def sales_in_category(response: Response, category_id: int, start: date = Query(...), end: date = Query(...), db: AsyncSession = Depends(get_async_db)):
+    rows = await get_sales_by_category_async(db, start, end, category_id)
+    if FAST_JSON_RESPONSES:
+        return fast_json(response, [{"category": cat, "units_sold": int(units), "revenue": float(rev)} for cat, units, rev in rows])
     return [RevenueByCategory(category=cat, units_sold=int(units),revenue=float(rev)) for cat, units, rev in rows]
 
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Security
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Security
 from sqlalchemy.orm import Session
 from typing import List
 
 from database import SessionLocal
 from app.crud.user_crud import *
+from app.crud.pagination import PageParams, set_next_cursor
+from app.crud.auth_cache import Principal, principal_cache
 from app.schemas.schemas import UserCreate, RoleCreate, User as UserSchema, Role as RoleSchema, UserRoleBase, LoginRequest
 
 router = APIRouter()
@@ -15,7 +17,10 @@ def get_db():
     finally:
         db.close()
         
-def get_current_user(token: str, db: Session) -> User:
+def get_current_user(token: str, db: Session) -> Principal:
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username = payload.get("sub")
@@ -29,12 +34,13 @@ def get_current_user(token: str, db: Session) -> User:
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Please Login First", headers={"WWW-Authenticate": "Bearer"})
 
-    user.token_roles = roles
-    return user
+    principal = Principal(id=user.id, username=user.username, roles=roles)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
 
 def Isadmin(token: str, db: Session):
     current_user=get_current_user(token, db)
-    if "admin" not in current_user.token_roles:
+    if "admin" not in current_user.roles:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return True
     
@@ -55,8 +61,10 @@ def create_new_user(user_in: UserCreate, db: Session = Depends(get_db)):
         return create_user(db, user_in)
 
 @router.get("/Get_All_Users/", response_model=List[UserSchema], tags=["Users"])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return list_users(db, skip=skip, limit=limit)
+def read_users(response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    users, next_cursor = list_users(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return users
 
 @router.get("/Get_User/{user_id}", response_model=UserSchema, tags=["Users"])
 def read_user(user_id: int, db: Session = Depends(get_db)):
@@ -85,8 +93,10 @@ def create_new_role(role_in: RoleCreate, db: Session = Depends(get_db)):
     return create_role(db, role_in)
 
 @router.get("/Get_All_Roles/", response_model=List[RoleSchema], tags=["Roles"])
-def read_roles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return list_roles(db, skip, limit)
+def read_roles(response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    roles, next_cursor = list_roles(db, page.cursor, page.limit)
+    set_next_cursor(response, next_cursor)
+    return roles
 
 @router.get("/Get_Role/{role_id}", response_model=RoleSchema, tags=["Roles"])
 def read_role(role_id: int, db: Session = Depends(get_db)):
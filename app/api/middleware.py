@@ -0,0 +1,44 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import time
+
+from app.crud.metrics import RequestStats, current_request, route_metrics
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+class SQLTimingMiddleware:
+    """
+    Counts the SQL statements and DB time each request causes, reports them in a Server-Timing
+    header and records per-route latency and SQL totals in route_metrics.
+
+    The header is written when the response starts, so statements run while a streaming body is
+    being sent are only reflected in the metrics.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = 'db;dur=%.2f;desc="%d queries", app;dur=%.2f' % (
+                    stats.db_seconds * 1000, stats.queries, (time.perf_counter() - started) * 1000
+                )
+                message["headers"] = list(message.get("headers", [])) + [(SERVER_TIMING_HEADER, timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route_metrics.observe(scope["method"], stats.route, status, time.perf_counter() - started, stats)
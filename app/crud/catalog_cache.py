@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+from pydantic import BaseModel
+from dotenv import load_dotenv
+import os
+import threading
+import time
+
+load_dotenv()
+
+CATALOG_CACHE_MAX_SIZE = int(os.getenv("CATALOG_CACHE_MAX_SIZE", 5000))
+# Writes made by other worker processes are picked up when an ETag check reads the stored catalog
+# version (see app/crud/data_version.py), or else once entries age out
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", 60))
+
+
+class CatalogCache:
+    """
+    Bounded LRU for product and category reads, invalidated by a version stamp.
+    Every catalog write calls bump(), which advances the version and drops all entries;
+    a load that started before a bump is not stored, so a racing write cannot be cached over.
+    observe() bumps too when the version stored in the database has moved since it last looked.
+    Values are pydantic snapshots rather than ORM objects, so they are safe to share across sessions.
+    """
+    def __init__(self, max_size: int = CATALOG_CACHE_MAX_SIZE, ttl: float = CATALOG_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._stored_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: Hashable, value: Any, version: int) -> None:
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def bump(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def observe(self, stored_version: int) -> None:
+        """
+        Drops all entries if the catalog version stored in the database differs from the last one seen.
+        """
+        with self._lock:
+            if stored_version == self._stored_version:
+                return
+            # The first look clears too: entries loaded before it may predate the stored version
+            self._stored_version = stored_version
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+catalog_cache = CatalogCache()
+
+
+def read_through(key: Hashable, load: Callable[[], Any]) -> Any:
+    """
+    Returns the cached value for key, or load()'s result, which is cached for the next caller.
+    None (not found) is not cached: the row may be created by another worker, which this one
+    would not notice until the entry aged out.
+    """
+    hit, value = catalog_cache.get(key)
+    if hit:
+        return value
+    version = catalog_cache.version
+    value = load()
+    if value is not None:
+        catalog_cache.put(key, value, version)
+    return value
+
+
+def snapshot(schema: Type[BaseModel], obj: Any) -> Optional[BaseModel]:
+    """
+    Returns obj copied into schema, detached from any session, or None when obj is None.
+    """
+    if obj is None:
+        return None
+    if hasattr(schema, "model_validate"):
+        return schema.model_validate(obj, from_attributes=True)
+    return schema.from_orm(obj)
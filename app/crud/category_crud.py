@@ -3,36 +3,57 @@ from datetime import datetime
 from typing import List, Optional, Tuple
 
 from app.models.models import Category
-from app.schemas.schemas import CategoryCreate
+from app.schemas.schemas import CategoryCreate, Category as CategorySchema
+from app.crud.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.crud.catalog_cache import catalog_cache, read_through, snapshot
+from app.crud.data_version import CATALOG, bump_version
 
 def create_category(db: Session, cat_in: CategoryCreate) -> Category:
     db_cat = Category(**cat_in.dict())
     db.add(db_cat)
+    bump_version(db, CATALOG)
     db.commit()
     db.refresh(db_cat)
+    catalog_cache.bump()
     return db_cat
 
-def get_category(db: Session, category_id: int) -> Optional[Category]:
+def _load_category(db: Session, category_id: int) -> Optional[Category]:
     return db.query(Category).filter(Category.id == category_id).first()
 
-def list_categories(db: Session, skip: int = 0, limit: int = 100) -> List[Category]:
-    return db.query(Category).offset(skip).limit(limit).all()
+def get_category(db: Session, category_id: int) -> Optional[CategorySchema]:
+    """
+    Returns a cached snapshot of the category, or None if it does not exist.
+    """
+    def load():
+        cat = _load_category(db, category_id)
+        return snapshot(CategorySchema, cat)
+    return read_through(("category", category_id), load)
+
+def list_categories(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[CategorySchema], Optional[str]]:
+    def load():
+        cats, next_cursor = paginate(db.query(Category), Category.id, Category.id, cursor, limit)
+        return [snapshot(CategorySchema, cat) for cat in cats], next_cursor
+    return read_through(("categories", cursor, limit), load)
 
 def update_category(db: Session, category_id: int, cat_in: CategoryCreate) -> Optional[Category]:
-    db_cat = get_category(db, category_id)
+    db_cat = _load_category(db, category_id)
     if not db_cat:
         return None
     for key, value in cat_in.dict().items():
         setattr(db_cat, key, value)
+    bump_version(db, CATALOG)
     db.commit()
     db.refresh(db_cat)
+    catalog_cache.bump()
     return db_cat
 
 def delete_category(db: Session, category_id: int) -> bool:
-    db_cat = get_category(db, category_id)
+    db_cat = _load_category(db, category_id)
     if not db_cat:
         return False
     db.delete(db_cat)
+    bump_version(db, CATALOG)
     db.commit()
+    catalog_cache.bump()
     return True
 
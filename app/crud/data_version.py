@@ -0,0 +1,45 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import DataVersion
+from app.crud.catalog_cache import catalog_cache
+from app.crud.upsert import upsert_add
+
+# Names of the counters in data_versions
+CATALOG = "catalog"
+SALES = "sales"
+
+
+def bump_version(db: Session, name: str) -> None:
+    """
+    Increment the named counter as part of db's transaction; the caller commits.
+    """
+    upsert_add(db, DataVersion.__table__, [{"name": name, "version": 1}], keys=("name",), totals=("version",))
+
+
+def _version_stmt(name: str):
+    return select(DataVersion.version).where(DataVersion.name == name)
+
+
+def version_subquery(name: str):
+    """
+    The named counter as a scalar subquery, 0 before its first bump, for stamps that combine several values.
+    """
+    return func.coalesce(_version_stmt(name).scalar_subquery(), 0)
+
+
+def catalog_stamp(db: Session) -> int:
+    """
+    Returns the catalog version stored in the database, which every worker sees, and drops this
+    process's cached catalog reads if another worker has written since.
+    """
+    version = db.execute(_version_stmt(CATALOG)).scalar() or 0
+    catalog_cache.observe(version)
+    return version
+
+
+async def catalog_stamp_async(db: AsyncSession) -> int:
+    version = (await db.execute(_version_stmt(CATALOG))).scalar() or 0
+    catalog_cache.observe(version)
+    return version
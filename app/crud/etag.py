@@ -0,0 +1,37 @@
+from fastapi import Request, Response, status
+from typing import Any, Optional
+import hashlib
+
+ETAG_HEADER = "ETag"
+IF_NONE_MATCH_HEADER = "If-None-Match"
+
+
+def make_etag(request: Request, *stamp: Any) -> str:
+    """
+    Returns a weak ETag for request's URL at the data version described by stamp.
+    """
+    raw = repr((request.url.path, request.url.query) + stamp).encode()
+    return 'W/"%s"' % hashlib.sha1(raw).hexdigest()[:20]
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == wanted:
+            return True
+    return False
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Tags response with etag. Returns a 304 response to send instead when the client already holds etag.
+    """
+    if_none_match = request.headers.get(IF_NONE_MATCH_HEADER)
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag})
+    response.headers[ETAG_HEADER] = etag
+    return None
@@ -0,0 +1,100 @@
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Union
+from dotenv import load_dotenv
+import csv
+import io
+import json
+import os
+
+from database import SessionLocal
+
+load_dotenv()
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ChainedRows:
+    """
+    A Result followed by more batches of rows in the same columns, for exports drawn from more than one source.
+    """
+    def __init__(self, result: Result, more: Iterable[Sequence]):
+        self.result = result
+        self.more = more
+
+    def keys(self):
+        return self.result.keys()
+
+    def partitions(self) -> Iterator[Sequence]:
+        yield from self.result.partitions()
+        yield from self.more
+
+
+_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson_lines(columns: List[str], batch: Sequence) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")) + "\n" for row in batch
+    )
+
+
+def _csv_lines(writer, buffer: io.StringIO, rows: Sequence) -> str:
+    # Same values as the NDJSON export: ISO dates and plain numbers, not str() of the column types
+    writer.writerows(map(_plain, row) for row in rows)
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def _stream(fmt: ExportFormat, run_query: Callable[[Session], Union[Result, ChainedRows]]) -> Iterator[str]:
+    # The response body outlives the request's get_db session, so it owns its own.
+    db = SessionLocal()
+    try:
+        result = run_query(db)
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == ExportFormat.csv:
+            yield _csv_lines(writer, buffer, [columns])
+        for batch in result.partitions():
+            if fmt == ExportFormat.csv:
+                yield _csv_lines(writer, buffer, batch)
+            else:
+                yield _ndjson_lines(columns, batch)
+    finally:
+        db.close()
+
+
+def export_response(fmt: ExportFormat, run_query: Callable[[Session], Union[Result, ChainedRows]], filename: str) -> StreamingResponse:
+    """
+    Stream the rows produced by run_query(db) as NDJSON or CSV, one yield_per batch at a time.
+    run_query must return a Result executed with stream_results/yield_per so rows are never all in memory,
+    or a ChainedRows whose extra batches are produced lazily.
+    """
+    return StreamingResponse(
+        _stream(fmt, run_query),
+        media_type=_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt.value}"'},
+    )
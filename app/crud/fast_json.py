@@ -0,0 +1,34 @@
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from typing import Any
+from dotenv import load_dotenv
+import os
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard json encoder
+    orjson = None
+
+load_dotenv()
+
+# Aggregate routes skip per-row pydantic models and response_model validation when enabled
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson when it is installed. Content must already be plain
+    dicts, lists, strings and numbers; it decodes to the same JSON as JSONResponse.
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+def fast_json(response: Response, content: Any) -> FastJSONResponse:
+    """
+    Returns content as a FastJSONResponse carrying the headers already set on response
+    (pagination cursor, ETag).
+    """
+    return FastJSONResponse(content, headers=dict(response.headers))
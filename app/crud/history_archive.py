@@ -0,0 +1,145 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+import gzip
+import json
+import os
+import threading
+
+load_dotenv()
+
+HISTORY_ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", os.path.join("archive", "inventory_history"))
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", 90))
+
+MANIFEST_NAME = "manifest.json"
+
+
+class ArchivedChange(NamedTuple):
+    id: int
+    product_id: int
+    change_qty: int
+    reason: Optional[str]
+    changed_at: datetime
+    # Filled in by the reader from the catalog; not stored in the files
+    product: Any = None
+
+
+class HistoryArchive:
+    """
+    Inventory history older than the retention window, as one gzip-compressed NDJSON file per day
+    under <root>/<YYYY>/<MM>/<YYYY-MM-DD>.ndjson.gz, rows newest first.
+
+    manifest.json records the day before which every change lives in the archive ("archived_before")
+    and, per day, the row count and product ids, so product reads skip days without that product.
+    The manifest is written last and atomically: readers trust the database for changes at or after
+    archived_before and the files for everything earlier.
+    """
+    def __init__(self, root: str = HISTORY_ARCHIVE_DIR):
+        self.root = root
+        self._manifest: Dict = {"archived_before": None, "days": {}}
+        self._manifest_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.root, day[:4], day[5:7], f"{day}.ndjson.gz")
+
+    def manifest(self) -> Dict:
+        path = os.path.join(self.root, MANIFEST_NAME)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return self._manifest
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                with open(path) as f:
+                    self._manifest = json.load(f)
+                self._manifest_mtime = mtime
+            return self._manifest
+
+    def archived_before(self) -> Optional[datetime]:
+        """
+        Returns the start of the first day still kept in the database, or None when nothing is archived.
+        """
+        day = self.manifest()["archived_before"]
+        return datetime.combine(date.fromisoformat(day), datetime.min.time()) if day else None
+
+    def _read_day(self, day: str) -> List[ArchivedChange]:
+        with gzip.open(self._path(day), "rt") as f:
+            return [
+                ArchivedChange(row[0], row[1], row[2], row[3], datetime.fromisoformat(row[4]))
+                for row in map(json.loads, f)
+            ]
+
+    def write_day(self, day: date, rows: Iterable[Tuple]) -> Dict:
+        """
+        Write (id, product_id, change_qty, reason, changed_at) rows for day, merged by id with any file
+        already there (a rerun after an interrupted archive). Returns the day's manifest entry.
+        """
+        key = day.isoformat()
+        path = self._path(key)
+        merged = {row[0]: ArchivedChange(*row) for row in rows}
+        if os.path.exists(path):
+            for row in self._read_day(key):
+                merged.setdefault(row.id, row)
+        ordered = sorted(merged.values(), key=lambda row: (row.changed_at, row.id), reverse=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path + ".tmp", "wt") as f:
+            for row in ordered:
+                f.write(json.dumps([row.id, row.product_id, row.change_qty, row.reason, row.changed_at.isoformat()], separators=(",", ":")) + "\n")
+        os.replace(path + ".tmp", path)
+        return {"rows": len(ordered), "products": sorted({row.product_id for row in ordered})}
+
+    def publish(self, archived_before: date, days: Dict[str, Dict]) -> None:
+        """
+        Atomically record newly written days and move the archive boundary forward.
+        """
+        manifest = dict(self.manifest())
+        manifest["days"] = dict(manifest["days"], **days)
+        manifest["archived_before"] = max(filter(None, [manifest["archived_before"], archived_before.isoformat()]))
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def batches(self, before: date) -> Iterator[List[Tuple]]:
+        """
+        Yields the (id, product_id, change_qty, reason, changed_at) rows of every archived day before
+        `before`, one day per batch, newest first.
+        """
+        for day in sorted(self.manifest()["days"], reverse=True):
+            if day < before.isoformat():
+                yield [tuple(row[:5]) for row in self._read_day(day)]
+
+    def read(self, after: Optional[Tuple[datetime, int]], limit: int, product_id: Optional[int] = None) -> Tuple[List[ArchivedChange], bool]:
+        """
+        Returns up to limit archived changes ordered newest first, starting just past after
+        (a (changed_at, id) position, or None for the newest), and whether more remain.
+        """
+        manifest = self.manifest()
+        days = sorted(manifest["days"], reverse=True)
+        if after is not None:
+            days = [day for day in days if day <= after[0].date().isoformat()]
+        rows: List[ArchivedChange] = []
+        for day in days:
+            if product_id is not None and product_id not in manifest["days"][day]["products"]:
+                continue
+            for row in self._read_day(day):
+                if after is not None and (row.changed_at, row.id) >= after:
+                    continue
+                if product_id is not None and row.product_id != product_id:
+                    continue
+                rows.append(row)
+                if len(rows) > limit:
+                    return rows[:limit], True
+        return rows, False
+
+
+history_archive = HistoryArchive()
+
+
+def retention_cutoff(retention_days: int = HISTORY_RETENTION_DAYS, today: Optional[date] = None) -> date:
+    """
+    Returns the first day kept in the database: whole days before it are archived.
+    """
+    return (today or datetime.utcnow().date()) - timedelta(days=retention_days)
@@ -1,19 +1,42 @@
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import List, Tuple, Optional
-from app.models.models import Inventory, InventoryHistory
+from sqlalchemy import DateTime, delete, func, insert, literal, select, union_all, update
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime, timezone
+from itertools import groupby
+from typing import Any, Dict, List, Tuple, Optional, Union
+from app.models.models import Inventory, InventoryCheckpoint, InventoryHistory, InventoryHistoryDaily, Product
 from app.schemas.schemas import InventoryCreate, InventoryHistoryCreate
+from app.crud.pagination import decode_cursor, encode_cursor, paginate, paginate_async, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.crud.export import EXPORT_BATCH_SIZE, ChainedRows
+from app.crud.history_archive import HistoryArchive, history_archive
+from app.crud.low_stock_events import low_stock_broker
+import asyncio
+
+_inventory_product = joinedload(Inventory.product).joinedload(Product.category)
+_history_product = joinedload(InventoryHistory.product).joinedload(Product.category)
 
 def get_inventory(db: Session, product_id: int) -> Optional[Inventory]:
     return db.query(Inventory).filter(Inventory.product_id == product_id).first()
 
 
-def list_inventory(db: Session) -> List[Inventory]:
-    return db.query(Inventory).all()
+def list_inventory(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Inventory], Optional[str]]:
+    return paginate(db.query(Inventory).options(_inventory_product), Inventory.id, Inventory.id, cursor, limit)
+
+
+def list_low_stock(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Inventory], Optional[str]]:
+    query = db.query(Inventory).options(_inventory_product).filter(Inventory.is_low_stock == True)
+    return paginate(query, Inventory.id, Inventory.id, cursor, limit)
 
 
-def list_low_stock(db: Session) -> List[Inventory]:
-    return db.query(Inventory).filter(Inventory.quantity_on_hand <= Inventory.low_stock_threshold).all()
+def _publish_low_stock(inv: Inventory) -> None:
+    low_stock_broker.publish({
+        "product_id": inv.product_id,
+        "quantity_on_hand": inv.quantity_on_hand,
+        "low_stock_threshold": inv.low_stock_threshold,
+        "low_stock": inv.is_low_stock,
+        "at": inv.last_updated.isoformat(),
+    })
 
 
 def create_inventory(db: Session, inv_in: InventoryCreate) -> Inventory:
@@ -21,29 +44,91 @@ def create_inventory(db: Session, inv_in: InventoryCreate) -> Inventory:
         product_id=inv_in.product_id,
         quantity_on_hand=inv_in.quantity_on_hand,
         low_stock_threshold=inv_in.low_stock_threshold,
+        is_low_stock=inv_in.quantity_on_hand <= inv_in.low_stock_threshold,
         last_updated=datetime.utcnow()
     )
     db.add(inv)
+    # Opening stock is a change like any other, so replaying history reproduces quantity_on_hand
+    db.add(InventoryHistory(product_id=inv.product_id, change_qty=inv.quantity_on_hand, reason="initial stock", changed_at=inv.last_updated))
     db.commit()
     db.refresh(inv)
+    if inv.is_low_stock:
+        _publish_low_stock(inv)
     return inv
 
 
-def update_inventory(db: Session, product_id: int, change_qty: int, reason: str) -> Tuple[Optional[Inventory], Optional[InventoryHistory]]:
-    inv = get_inventory(db, product_id)
-    inv.quantity_on_hand += change_qty
-    inv.last_updated = datetime.utcnow()
+def sync_low_stock_flags(db: Session) -> int:
+    """
+    Recompute is_low_stock for every row whose flag disagrees with its quantity.
+    Only needed after writing inventory outside the CRUD layer. Returns the number of rows fixed.
+    """
+    computed = Inventory.quantity_on_hand <= Inventory.low_stock_threshold
+    result = db.execute(
+        update(Inventory)
+        .where(Inventory.is_low_stock != computed)
+        .values(is_low_stock=computed)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def update_inventory(db: Session, product_id: int, change_qty: int, reason: str, allow_negative: bool = True) -> Tuple[Optional[Inventory], Optional[InventoryHistory]]:
+    """
+    Applies change_qty with a single UPDATE ... SET quantity_on_hand = quantity_on_hand + change_qty,
+    so concurrent adjustments cannot lose updates, and inserts the history row in the same transaction.
+    Returns (None, None) and changes nothing when there is no inventory row for the product,
+    or when allow_negative is False and the change would take stock below zero; returns (None, hist)
+    when the row was deleted right after the change committed.
+    """
+    now = datetime.utcnow()
+    new_qty = Inventory.quantity_on_hand + change_qty
+    stmt = (
+        update(Inventory)
+        .where(Inventory.product_id == product_id)
+        # MySQL applies SET assignments left to right, so the flag goes first and still sees the old quantity,
+        # as every other dialect does for the whole statement
+        .ordered_values(
+            (Inventory.is_low_stock, new_qty <= Inventory.low_stock_threshold),
+            (Inventory.quantity_on_hand, new_qty),
+            (Inventory.last_updated, now),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if not allow_negative:
+        stmt = stmt.where(Inventory.quantity_on_hand + change_qty >= 0)
+    returned = None
+    if getattr(db.get_bind().dialect, "update_returning", False):
+        returned = db.execute(stmt.returning(Inventory.quantity_on_hand, Inventory.low_stock_threshold)).first()
+        updated = returned is not None
+    else:
+        updated = db.execute(stmt).rowcount > 0
+    if not updated:
+        db.rollback()
+        return None, None
+
     hist = InventoryHistory(
         product_id=product_id,
         change_qty=change_qty,
         reason=reason,
-        changed_at=datetime.utcnow()
+        changed_at=now
     )
-    db.add(inv)
     db.add(hist)
     db.commit()
-    db.refresh(inv)
-    db.refresh(hist)
+    # One read for the response body, which nests the product and its category
+    inv = (
+        db.query(Inventory)
+          .options(_inventory_product)
+          .filter(Inventory.product_id == product_id)
+          .populate_existing()
+          .first()
+    )
+    if inv is None:
+        return None, hist
+    # RETURNING gives this statement's own result; without it the re-read is the best available
+    quantity, threshold = returned if returned is not None else (inv.quantity_on_hand, inv.low_stock_threshold)
+    if (quantity - change_qty <= threshold) != (quantity <= threshold):
+        _publish_low_stock(inv)
     return inv, hist
 
 def delete_inventory(db: Session, product_id: int) -> bool:
@@ -52,8 +137,214 @@ def delete_inventory(db: Session, product_id: int) -> bool:
     db.commit()
     return True
 
-def list_inventory_history(db: Session) -> List[InventoryHistory]:
-    return db.query(InventoryHistory).order_by(InventoryHistory.changed_at.desc()).all()
+def list_inventory_history(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[InventoryHistory], Optional[str]]:
+    return paginate(db.query(InventoryHistory).options(_history_product), InventoryHistory.changed_at, InventoryHistory.id, cursor, limit, descending=True)
+
+def get_inventory_history(db: Session, product_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[InventoryHistory], Optional[str]]:
+    query = db.query(InventoryHistory).options(_history_product).filter(InventoryHistory.product_id == product_id)
+    return paginate(query, InventoryHistory.changed_at, InventoryHistory.id, cursor, limit, descending=True)
+
+def stream_inventory_history(db: Session, batch_size: int = EXPORT_BATCH_SIZE) -> Union[Result, ChainedRows]:
+    """
+    Returns plain history rows, newest first: a server-side Result fetched batch_size rows at a time,
+    followed by the archived days read one file at a time once the table runs out.
+    """
+    stmt = (
+        select(InventoryHistory.id, InventoryHistory.product_id, InventoryHistory.change_qty, InventoryHistory.reason, InventoryHistory.changed_at)
+        .order_by(InventoryHistory.changed_at.desc(), InventoryHistory.id.desc())
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    boundary = history_archive.archived_before()
+    if boundary is None:
+        return db.execute(stmt)
+    # Rows left in the table by an interrupted archive run are exported once, from the files
+    return ChainedRows(db.execute(stmt.where(InventoryHistory.changed_at >= boundary)), history_archive.batches(boundary.date()))
+
+def archive_inventory_history(db: Session, before: date, archive: HistoryArchive = history_archive) -> Tuple[int, int]:
+    """
+    Moves history from the whole days before `before` into the archive files and keeps each product's
+    net change per day in inventory_history_daily. Files and manifest are written before the rows are
+    deleted, so an interrupted run loses nothing and a rerun merges into the same files.
+    Returns (rows archived, days written).
+    """
+    cutoff = datetime.combine(before, datetime.min.time())
+    stmt = (
+        select(InventoryHistory.id, InventoryHistory.product_id, InventoryHistory.change_qty, InventoryHistory.reason, InventoryHistory.changed_at)
+        .where(InventoryHistory.changed_at < cutoff)
+        .order_by(InventoryHistory.changed_at, InventoryHistory.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    days: Dict[str, Dict] = {}
+    totals: Dict[Tuple[int, date], List[int]] = {}
+    archived = 0
+    for day, rows in groupby(db.execute(stmt), key=lambda row: row.changed_at.date()):
+        rows = list(rows)
+        days[day.isoformat()] = archive.write_day(day, rows)
+        for row in rows:
+            total = totals.setdefault((row.product_id, day), [0, 0])
+            total[0] += row.change_qty
+            total[1] += 1
+        archived += len(rows)
+    archive.publish(before, days)
+    if not totals:
+        return 0, 0
+
+    # Late rows for a day compacted by an earlier run are added to its existing totals
+    existing = {
+        (daily.product_id, daily.day): daily
+        for daily in db.query(InventoryHistoryDaily).filter(InventoryHistoryDaily.day >= min(day for _, day in totals), InventoryHistoryDaily.day < before)
+    }
+    new_rows = []
+    for (product_id, day), (net_change, changes) in totals.items():
+        daily = existing.get((product_id, day))
+        if daily is None:
+            new_rows.append({"product_id": product_id, "day": day, "net_change": net_change, "changes": changes})
+        else:
+            daily.net_change += net_change
+            daily.changes += changes
+    if new_rows:
+        db.execute(insert(InventoryHistoryDaily), new_rows)
+    db.execute(delete(InventoryHistory).where(InventoryHistory.changed_at < cutoff).execution_options(synchronize_session=False))
+    db.commit()
+    return archived, len(days)
+
+def take_inventory_checkpoint(db: Session, taken_at: Optional[datetime] = None) -> int:
+    """
+    Copies every product's quantity_on_hand into inventory_checkpoints at taken_at (default now).
+    Returns the number of rows written.
+    """
+    taken_at = taken_at or datetime.utcnow()
+    result = db.execute(
+        insert(InventoryCheckpoint).from_select(
+            ["taken_at", "product_id", "quantity_on_hand"],
+            select(literal(taken_at, DateTime), Inventory.product_id, Inventory.quantity_on_hand)
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+# --- Async variants of the read paths ---
+
+def _inventory_stamp_stmt():
+    # Every quantity change writes a history row; count, max id and last_updated cover creates and deletes
+    return select(
+        select(func.max(InventoryHistory.id)).scalar_subquery(),
+        func.count(Inventory.id),
+        func.max(Inventory.id),
+        func.max(Inventory.last_updated),
+    )
+
+async def inventory_stamp_async(db: AsyncSession) -> Tuple:
+    """
+    Returns a cheap fingerprint of the inventory table that changes whenever any row does.
+    """
+    return tuple((await db.execute(_inventory_stamp_stmt())).one())
+
+async def get_inventory_async(db: AsyncSession, product_id: int) -> Optional[Inventory]:
+    stmt = select(Inventory).options(_inventory_product).where(Inventory.product_id == product_id)
+    return (await db.execute(stmt)).scalars().first()
+
+async def list_inventory_async(db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Inventory], Optional[str]]:
+    stmt = select(Inventory).options(_inventory_product)
+    return await paginate_async(db, stmt, Inventory.id, Inventory.id, cursor, limit)
+
+async def list_low_stock_async(db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Inventory], Optional[str]]:
+    stmt = select(Inventory).options(_inventory_product).where(Inventory.is_low_stock == True)
+    return await paginate_async(db, stmt, Inventory.id, Inventory.id, cursor, limit)
+
+async def _history_page_async(db: AsyncSession, stmt, cursor: Optional[str], limit: int, product_id: Optional[int] = None) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of history, newest first, from the table and then from the archive files once the table
+    runs out. Both sides share the (changed_at, id) order, so a cursor continues from either.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    boundary = history_archive.archived_before()
+    if boundary is not None:
+        stmt = stmt.where(InventoryHistory.changed_at >= boundary)
+    rows, next_cursor = await paginate_async(db, stmt, InventoryHistory.changed_at, InventoryHistory.id, cursor, limit, descending=True)
+    if boundary is None or next_cursor is not None:
+        return rows, next_cursor
+
+    if rows:
+        after = (rows[-1].changed_at, rows[-1].id)
+    else:
+        after = decode_cursor(cursor) if cursor is not None else None
+    archived, more = await asyncio.to_thread(history_archive.read, after, limit - len(rows), product_id)
+    if archived:
+        products = (await db.execute(
+            select(Product).options(joinedload(Product.category)).where(Product.id.in_({row.product_id for row in archived}))
+        )).scalars().all()
+        by_id = {product.id: product for product in products}
+        rows = rows + [row._replace(product=by_id.get(row.product_id)) for row in archived]
+    return rows, encode_cursor(rows[-1].changed_at, rows[-1].id) if more else None
+
+async def list_inventory_history_async(db: AsyncSession, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    stmt = select(InventoryHistory).options(_history_product)
+    return await _history_page_async(db, stmt, cursor, limit)
+
+async def get_inventory_history_async(db: AsyncSession, product_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    stmt = select(InventoryHistory).options(_history_product).where(InventoryHistory.product_id == product_id)
+    return await _history_page_async(db, stmt, cursor, limit, product_id)
+
+async def _as_of_anchor_async(db: AsyncSession, ts: datetime) -> Tuple[Optional[datetime], datetime]:
+    """
+    Returns (checkpoint, at) for the state nearest to ts: a checkpoint's taken_at, or (None, now)
+    when the live inventory table is closer.
+    Checkpoints taken before the archive boundary are never used: an archived day only keeps its net
+    change, so a checkpoint taken partway through it cannot be told which of that day's changes it includes.
+    """
+    boundary = history_archive.archived_before()
+    usable = [InventoryCheckpoint.taken_at >= boundary] if boundary is not None else []
+    before, after = (await db.execute(select(
+        select(func.max(InventoryCheckpoint.taken_at)).where(InventoryCheckpoint.taken_at <= ts, *usable).scalar_subquery(),
+        select(func.min(InventoryCheckpoint.taken_at)).where(InventoryCheckpoint.taken_at >= ts, *usable).scalar_subquery(),
+    ))).one()
+    now = datetime.utcnow()
+    candidates = [(abs(now - ts), None, now)]
+    candidates += [(abs(at - ts), at, at) for at in (before, after) if at is not None]
+    _, checkpoint, at = min(candidates, key=lambda candidate: candidate[0])
+    return checkpoint, at
+
+def _as_of_stmt(ts: datetime, checkpoint: Optional[datetime], at: datetime):
+    """
+    Stock per product at ts: the anchor state plus (or minus, when the anchor is later than ts) the
+    changes between the two, summed in one grouped query. Changes from archived days come from
+    inventory_history_daily and count as of the end of their day.
+    """
+    forward = at <= ts
+    low, high = (at, ts) if forward else (ts, at)
+    sign = 1 if forward else -1
+    if checkpoint is None:
+        anchor = select(Inventory.product_id, Inventory.quantity_on_hand.label("quantity"), literal(1).label("anchored"))
+    else:
+        anchor = (
+            select(InventoryCheckpoint.product_id, InventoryCheckpoint.quantity_on_hand.label("quantity"), literal(1).label("anchored"))
+            .where(InventoryCheckpoint.taken_at == checkpoint)
+        )
+    changes = (
+        select(InventoryHistory.product_id, InventoryHistory.change_qty * sign, literal(0))
+        .where(InventoryHistory.changed_at > low, InventoryHistory.changed_at <= high)
+    )
+    compacted = (
+        select(InventoryHistoryDaily.product_id, InventoryHistoryDaily.net_change * sign, literal(0))
+        .where(InventoryHistoryDaily.day >= low.date(), InventoryHistoryDaily.day < high.date())
+    )
+    rows = union_all(anchor, changes, compacted).subquery()
+    stmt = select(rows.c.product_id, func.sum(rows.c.quantity).label("quantity_on_hand")).group_by(rows.c.product_id)
+    if not forward:
+        # Walking back from a later state: products missing from it had no stock there to walk back from
+        stmt = stmt.having(func.max(rows.c.anchored) == 1)
+    return stmt, rows.c.product_id
+
+async def inventory_as_of_async(db: AsyncSession, ts: datetime, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Any], Optional[str]]:
+    """
+    Returns each product's quantity_on_hand at ts, reconstructed from the nearest checkpoint (or the
+    live table) and only the history between it and ts, paginated by product_id.
+    """
+    if ts.tzinfo is not None:
+        # Stored timestamps are naive UTC
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    checkpoint, at = await _as_of_anchor_async(db, ts)
+    stmt, product_id = _as_of_stmt(ts, checkpoint, at)
+    return await paginate_async(db, stmt, product_id, product_id, cursor, limit, scalars=False)
 
-def get_inventory_history(db: Session, product_id: int) -> List[InventoryHistory]:
-    return db.query(InventoryHistory).filter(Inventory.product_id == product_id).order_by(InventoryHistory.changed_at.desc()).all()
@@ -0,0 +1,109 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import heapq
+import os
+import threading
+import time
+
+from app.models.models import SalesDailyRollup
+
+load_dotenv()
+
+# Window totals are reloaded from sales_daily_rollup after this long, which bounds how stale sales from other workers can be
+LEADERBOARD_TTL_SECONDS = float(os.getenv("LEADERBOARD_TTL_SECONDS", 60))
+
+# Days covered by each rolling window, ending today (UTC)
+LEADERBOARD_WINDOWS = {"today": 1, "7d": 7, "30d": 30}
+
+
+class Leaderboards:
+    """
+    Per-product units and revenue for each rolling window, kept in memory so top-N reads need no SQL.
+    Loaded from sales_daily_rollup, then updated in place by every sale this process writes; reloaded
+    when the day changes or the TTL expires, which also corrects a sale counted twice or missed while
+    a reload was running.
+    """
+    def __init__(self, ttl: float = LEADERBOARD_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._today: Optional[date] = None
+        self._loaded_at = 0.0
+        # window -> product_id -> [category_id, units, revenue]
+        self._totals: Dict[str, Dict[int, list]] = {window: {} for window in LEADERBOARD_WINDOWS}
+        self.reloads = 0
+
+    def _stale(self, today: date) -> bool:
+        return self._today != today or time.monotonic() - self._loaded_at > self.ttl
+
+    def ensure(self, db: Session) -> None:
+        """
+        Reload the windows from the rollup if they are for another day or older than the TTL.
+        """
+        today = datetime.utcnow().date()
+        if not self._stale(today):
+            return
+        first = today - timedelta(days=max(LEADERBOARD_WINDOWS.values()) - 1)
+        rows = db.execute(
+            select(SalesDailyRollup.sale_date, SalesDailyRollup.product_id, SalesDailyRollup.category_id, SalesDailyRollup.units, SalesDailyRollup.revenue)
+            .where(SalesDailyRollup.sale_date.between(first, today))
+        ).all()
+        totals: Dict[str, Dict[int, list]] = {window: {} for window in LEADERBOARD_WINDOWS}
+        for sale_date, product_id, category_id, units, revenue in rows:
+            self._add(totals, today, sale_date, product_id, category_id, units, revenue)
+        with self._lock:
+            self._totals, self._today, self._loaded_at = totals, today, time.monotonic()
+            self.reloads += 1
+
+    @staticmethod
+    def _add(totals: Dict[str, Dict[int, list]], today: date, sale_date: date, product_id: int, category_id: Optional[int], units: int, revenue) -> None:
+        age = (today - sale_date).days
+        for window, days in LEADERBOARD_WINDOWS.items():
+            if 0 <= age < days:
+                entry = totals[window].setdefault(product_id, [category_id, 0, Decimal(0)])
+                entry[1] += units
+                entry[2] += Decimal(str(revenue))
+
+    def add(self, sale_date: date, product_id: int, category_id: Optional[int], quantity: int, total_amount) -> None:
+        """
+        Count a committed sale in every window it falls in.
+        """
+        with self._lock:
+            if self._today is not None:
+                self._add(self._totals, self._today, sale_date, product_id, category_id, quantity, total_amount)
+
+    def top(self, window: str, by: str, group: str, n: int, category_id: Optional[int] = None) -> List[Tuple[int, int, Decimal]]:
+        """
+        Returns up to n (id, units, revenue) rows for products or categories in window, best first.
+        Ties are broken by the lower id, as in the SQL version.
+        """
+        with self._lock:
+            entries = [(pid, entry[0], entry[1], entry[2]) for pid, entry in self._totals[window].items()]
+        # Sales whose product had no category are left out, like the SQL join on categories does
+        entries = [entry for entry in entries if entry[1] is not None and (category_id is None or entry[1] == category_id)]
+        if group == "category":
+            grouped: Dict[int, list] = {}
+            for _, cat, units, revenue in entries:
+                total = grouped.setdefault(cat, [0, Decimal(0)])
+                total[0] += units
+                total[1] += revenue
+            rows = [(cat, units, revenue) for cat, (units, revenue) in grouped.items()]
+        else:
+            rows = [(pid, units, revenue) for pid, _, units, revenue in entries]
+        metric = 2 if by == "revenue" else 1
+        return heapq.nsmallest(n, rows, key=lambda row: (-row[metric], row[0]))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "day": self._today.isoformat() if self._today else None,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._today else None,
+                "products": {window: len(totals) for window, totals in self._totals.items()},
+                "reloads": self.reloads,
+            }
+
+
+leaderboards = Leaderboards()
@@ -0,0 +1,48 @@
+from typing import Dict, Set, Tuple
+import asyncio
+import threading
+
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class LowStockBroker:
+    """
+    In-process fan-out of low-stock transitions to server-sent-event subscribers.
+    publish() is called from synchronous request threads after a commit; each subscriber
+    owns an asyncio.Queue on its event loop, fed thread-safely. A subscriber that falls
+    more than SUBSCRIBER_QUEUE_SIZE events behind misses events rather than blocking writers.
+    Transitions are only seen by clients connected to the same worker process.
+    """
+    def __init__(self):
+        self._subscribers: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Tuple[asyncio.AbstractEventLoop, asyncio.Queue]) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: Dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Subscriber's loop already closed; it will unsubscribe on its way out
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict) -> None:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+
+low_stock_broker = LowStockBroker()
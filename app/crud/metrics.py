@@ -0,0 +1,269 @@
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+import logging
+import os
+import re
+import threading
+import time
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram, safe to update from many threads.
+    """
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.total, self.count
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+
+class PoolMetrics:
+    """
+    Connection pool counters and histograms fed by SQLAlchemy pool events.
+    """
+    def __init__(self):
+        self.wait = Histogram()
+        self.hold = Histogram()
+        self.connects = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def bump(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def install(self, engine) -> None:
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            self.bump("connects")
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.bump("checkouts")
+            connection_record.info["checked_out_at"] = time.perf_counter()
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            started = connection_record.info.pop("checked_out_at", None)
+            if started is not None:
+                self.hold.observe(time.perf_counter() - started)
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.bump("invalidations")
+
+    def snapshot(self, pool) -> Dict:
+        stats = {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "wait_seconds": self.wait.snapshot(),
+            "hold_seconds": self.hold.snapshot(),
+        }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return stats
+
+
+# One per engine: the sync engine serves the write routes, the async one the analytics and inventory reads
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _TimedCheckout:
+    """
+    Pool mixin that records into `metrics` how long each checkout waited for a free (or new) connection.
+    """
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            self.metrics.bump("timeouts")
+            raise
+        finally:
+            self.metrics.wait.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics = pool_metrics
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+class RequestStats:
+    """
+    SQL work done on behalf of one HTTP request.
+    """
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope: Dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope before the endpoint runs
+        return getattr(self.scope.get("route"), "path", None) or "unmatched"
+
+
+# Set by the request middleware; copied into the threadpool for sync endpoints and into async DB calls
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_ROWS = re.compile(r"(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+", re.IGNORECASE)
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Returns statement with literals and placeholders as ?, IN lists and multi-row VALUES collapsed,
+    and whitespace squeezed, so the same query always logs the same way.
+    """
+    sql = " ".join(statement.split())
+    sql = _PLACEHOLDERS.sub("?", _LITERALS.sub("?", sql))
+    sql = _ROWS.sub(r"\1, ...", _LISTS.sub("(?, ...)", sql))
+    return sql
+
+
+class RouteMetrics:
+    """
+    Per-route request latency histograms, status counts and SQL counters, rendered for Prometheus.
+    """
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.queries: Dict[Tuple[str, str], int] = {}
+        self.db_seconds: Dict[Tuple[str, str], float] = {}
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    def install(self, engine) -> None:
+        """
+        Time every statement run on engine and charge it to the current request.
+        """
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - conn.info["query_started"].pop()
+            stats = current_request.get()
+            if stats is not None:
+                stats.queries += 1
+                stats.db_seconds += elapsed
+            if elapsed * 1000 >= SLOW_QUERY_MS:
+                with self._lock:
+                    self.slow_queries += 1
+                logger.warning("slow query: %.1f ms in %s: %s", elapsed * 1000, stats.route if stats else "background", normalize_sql(statement))
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram()
+            self.requests[key + (status,)] = self.requests.get(key + (status,), 0) + 1
+            self.queries[key] = self.queries.get(key, 0) + stats.queries
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + stats.db_seconds
+        histogram.observe(seconds)
+
+    def render(self) -> str:
+        """
+        Returns request, SQL and connection pool metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            latency = dict(self.latency)
+            requests = dict(self.requests)
+            queries = dict(self.queries)
+            db_seconds = dict(self.db_seconds)
+            slow_queries = self.slow_queries
+        lines: List[str] = []
+
+        def labels(**values) -> str:
+            if not values:
+                return ""
+            return "{" + ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in values.items()) + "}"
+
+        def histogram(name: str, help_text: str, series: Dict[Tuple, Histogram], label_names: Sequence[str]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(series.items()):
+                snap = hist.snapshot()
+                base = dict(zip(label_names, key))
+                for bound, count in snap["buckets"].items():
+                    lines.append(f"{name}_bucket{labels(**base, le=bound)} {count}")
+                lines.append(f"{name}_sum{labels(**base)} {snap['sum']}")
+                lines.append(f"{name}_count{labels(**base)} {snap['count']}")
+
+        def counter(name: str, help_text: str, series: Dict[Tuple, float], label_names: Sequence[str]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{labels(**dict(zip(label_names, key)))} {value}")
+
+        histogram("http_request_duration_seconds", "Request latency by route.", latency, ("method", "route"))
+        counter("http_requests_total", "Requests by route and status code.", requests, ("method", "route", "status"))
+        counter("db_queries_total", "SQL statements issued by route.", queries, ("method", "route"))
+        counter("db_time_seconds_total", "Time spent in SQL statements by route.", db_seconds, ("method", "route"))
+        counter("db_slow_queries_total", f"SQL statements slower than {SLOW_QUERY_MS:g} ms.", {(): slow_queries}, ())
+        pools = {"sync": pool_metrics, "async": async_pool_metrics}
+        histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection.", {(name,): metrics.wait for name, metrics in pools.items()}, ("pool",))
+        histogram("db_pool_hold_seconds", "Time a pooled connection stayed checked out.", {(name,): metrics.hold for name, metrics in pools.items()}, ("pool",))
+        counter("db_pool_events_total", "Connection pool events.", {
+            (name, kind): getattr(metrics, kind) for name, metrics in pools.items() for kind in ("connects", "checkouts", "timeouts", "invalidations")
+        }, ("pool", "event"))
+        return "\n".join(lines) + "\n"
+
+
+route_metrics = RouteMetrics()
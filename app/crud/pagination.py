@@ -0,0 +1,150 @@
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as OrmQuery
+from sqlalchemy.sql import Select
+from fastapi import HTTPException, Query, Response, status
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Tuple
+from dotenv import load_dotenv
+import base64
+import binascii
+import json
+import os
+
+load_dotenv()
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_ENCODERS = {
+    int: ("i", lambda v: v),
+    str: ("s", lambda v: v),
+    date: ("d", lambda v: v.isoformat()),
+    datetime: ("t", lambda v: v.isoformat()),
+}
+_DECODERS = {
+    "i": int,
+    "s": str,
+    "d": date.fromisoformat,
+    "t": datetime.fromisoformat,
+}
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """
+    Build an opaque cursor pointing just past (sort_value, row_id).
+    """
+    tag, dump = _ENCODERS[type(sort_value)]
+    raw = json.dumps([tag, dump(sort_value), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    Returns (sort_value, row_id) from a cursor made by encode_cursor.
+    Raises ValueError for anything that is not a valid cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tag, value, row_id = json.loads(raw)
+        return _DECODERS[tag](value), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _seek(query, sort_column, id_column, cursor: Optional[str], limit: int, descending: bool):
+    """
+    Applies the keyset filter, ordering and limit + 1 to an ORM Query or a select().
+    """
+    if cursor is not None:
+        sort_value, last_id = decode_cursor(cursor)
+        # Written as a range on the sort column plus a tie-breaker so the planner can seek an index;
+        # the equivalent "a > x OR (a = x AND id > y)" is served by a full scan on SQLite and MySQL.
+        if sort_column is id_column:
+            after = id_column < last_id if descending else id_column > last_id
+        elif descending:
+            after = and_(sort_column <= sort_value, or_(sort_column < sort_value, id_column < last_id))
+        else:
+            after = and_(sort_column >= sort_value, or_(sort_column > sort_value, id_column > last_id))
+        query = query.filter(after)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+    return query.limit(limit + 1)
+
+
+def _page(rows: List[Any], limit: int, key: Callable[[Any], Tuple[Any, int]]) -> Tuple[List[Any], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def _default_key(sort_column, id_column) -> Callable[[Any], Tuple[Any, int]]:
+    return lambda row: (getattr(row, sort_column.key), getattr(row, id_column.key))
+
+
+def paginate(
+    query: OrmQuery,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+    key: Optional[Callable[[Any], Tuple[Any, int]]] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Returns (rows, next_cursor) for one page of query ordered by (sort_column, id_column).
+    Seeks past the cursor position instead of using OFFSET, so every page costs the same.
+    key extracts (sort_value, id) from a row; by default the two columns are read as attributes.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = _seek(query, sort_column, id_column, cursor, limit, descending).all()
+    return _page(rows, limit, key or _default_key(sort_column, id_column))
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    descending: bool = False,
+    key: Optional[Callable[[Any], Tuple[Any, int]]] = None,
+    scalars: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    paginate for a select() run on an AsyncSession.
+    scalars returns the first column of each row (the ORM object for select(Model)); pass False for plain rows.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    result = await db.execute(_seek(stmt, sort_column, id_column, cursor, limit, descending))
+    rows = result.scalars().all() if scalars else result.all()
+    return _page(rows, limit, key or _default_key(sort_column, id_column))
+
+
+class PageParams:
+    """
+    Query parameters shared by every paginated list route.
+    """
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="next_cursor returned by the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, description=f"page size, at most {MAX_PAGE_SIZE}"),
+    ):
+        if cursor is not None:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        self.cursor = cursor
+        self.limit = min(limit, MAX_PAGE_SIZE)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,86 @@
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from passlib.context import CryptContext
+from typing import Callable, Optional, Tuple
+from dotenv import load_dotenv
+import multiprocessing
+import os
+import threading
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+# 0 workers hashes inline in the calling thread (useful for scripts and tests)
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", os.cpu_count() or 2))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", 2 * PASSWORD_POOL_WORKERS))
+PASSWORD_POOL_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_POOL_TIMEOUT_SECONDS", 10))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordPoolBusy(Exception):
+    """
+    Raised when every hashing worker is busy and the wait queue is full, or a hash timed out.
+    """
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+class PasswordPool:
+    """
+    Runs bcrypt in a dedicated process pool so hashing never holds the GIL of the API process.
+    At most workers + max_queue calls are in flight; anything beyond that fails fast with
+    PasswordPoolBusy, which also bounds how many request threads can be parked waiting on bcrypt.
+    """
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, max_queue: int = PASSWORD_POOL_MAX_QUEUE, timeout: float = PASSWORD_POOL_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_queue) if workers else None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the API process is multi-threaded and holds DB connections
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _run(self, fn: Callable, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future: Future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordPoolBusy()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Returns (matches, new_hash). new_hash is set when the stored hash uses an outdated cost.
+        """
+        return self._run(_verify_and_update, password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_pool = PasswordPool()
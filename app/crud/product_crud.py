@@ -1,43 +1,83 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 from typing import List, Optional, Tuple
 
-from app.models.models import Product
-from app.schemas.schemas import ProductCreate
+from app.models.models import Product, Sale, SalesDailyRollup
+from app.schemas.schemas import ProductCreate, Product as ProductSchema
+from app.crud.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.crud.catalog_cache import catalog_cache, read_through, snapshot
+from app.crud.data_version import CATALOG, SALES, bump_version
+from app.crud.sales_sketches import resketch_days
 
 def create_product(db: Session, prod_in: ProductCreate) -> Product:
     db_prod = Product(**prod_in.dict())
     db.add(db_prod)
+    bump_version(db, CATALOG)
     db.commit()
     db.refresh(db_prod)
+    catalog_cache.bump()
     return db_prod
-    
-def get_product(db: Session, product_id: int) -> Optional[Product]:
+
+def _load_product(db: Session, product_id: int) -> Optional[Product]:
     return db.query(Product).filter(Product.id == product_id).first()
+
+def _snapshot_page(page: Tuple[List[Product], Optional[str]]) -> Tuple[List[ProductSchema], Optional[str]]:
+    products, next_cursor = page
+    return [snapshot(ProductSchema, prod) for prod in products], next_cursor
+    
+def get_product(db: Session, product_id: int) -> Optional[ProductSchema]:
+    """
+    Returns a cached snapshot of the product, or None if it does not exist.
+    """
+    def load():
+        prod = db.query(Product).options(joinedload(Product.category)).filter(Product.id == product_id).first()
+        return snapshot(ProductSchema, prod)
+    return read_through(("product", product_id), load)
     
-def get_product_by_category(db: Session, category_id: int) -> List[Product]:
-    return db.query(Product).filter(Product.category_id == category_id).all()
+def get_product_by_category(db: Session, category_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[ProductSchema], Optional[str]]:
+    def load():
+        query = db.query(Product).options(joinedload(Product.category)).filter(Product.category_id == category_id)
+        return _snapshot_page(paginate(query, Product.id, Product.id, cursor, limit))
+    return read_through(("products_by_category", category_id, cursor, limit), load)
 
-def list_products(db: Session, skip: int = 0, limit: int = 100) -> List[Product]:
-    return db.query(Product).offset(skip).limit(limit).all()
+def list_products(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[ProductSchema], Optional[str]]:
+    def load():
+        query = db.query(Product).options(joinedload(Product.category))
+        return _snapshot_page(paginate(query, Product.id, Product.id, cursor, limit))
+    return read_through(("products", cursor, limit), load)
     
 def update_product(db: Session, product_id: int, prod_in: ProductCreate) -> Optional[Product]:
-    db_prod = get_product(db, product_id)
+    db_prod = _load_product(db, product_id)
     if not db_prod:
         return None
+    old_category_id = db_prod.category_id
     for key, value in prod_in.dict().items():
         setattr(db_prod, key, value)
     db_prod.updated_at = datetime.utcnow()
+    if db_prod.category_id != old_category_id:
+        # Past sales move with the product: keep the denormalized category on the sales rollup in step,
+        # and re-sketch the old and new category on every day it sold, from the flushed new category
+        db.query(SalesDailyRollup).filter(SalesDailyRollup.product_id == product_id).update(
+            {SalesDailyRollup.category_id: db_prod.category_id}, synchronize_session=False
+        )
+        db.flush()
+        days = [day for (day,) in db.query(Sale.sale_date).filter(Sale.product_id == product_id).distinct()]
+        resketch_days(db, days, [category_id for category_id in (old_category_id, db_prod.category_id) if category_id is not None])
+        bump_version(db, SALES)
+    bump_version(db, CATALOG)
     db.commit()
     db.refresh(db_prod)
+    catalog_cache.bump()
     return db_prod
 
 def delete_product(db: Session, product_id: int) -> bool:
-    db_prod = get_product(db, product_id)
+    db_prod = _load_product(db, product_id)
     if not db_prod:
         return False
     db.delete(db_prod)
+    bump_version(db, CATALOG)
     db.commit()
+    catalog_cache.bump()
     return True
 
 
@@ -0,0 +1,144 @@
+from typing import Iterable, Optional
+from dotenv import load_dotenv
+import math
+import os
+import struct
+import numpy as np
+
+load_dotenv()
+
+# Every quantile is returned within this relative error of a value that really is at that rank
+SKETCH_RELATIVE_ACCURACY = float(os.getenv("SKETCH_RELATIVE_ACCURACY", 0.01))
+
+# version, relative accuracy, zero count, min, max, sum, number of buckets
+_HEADER = struct.Struct("<Bdqdddi")
+_HEADER_DTYPE = np.dtype([("version", "u1"), ("accuracy", "<f8"), ("zero_count", "<i8"), ("min", "<f8"), ("max", "<f8"), ("sum", "<f8"), ("buckets", "<i4")])
+_VERSION = 1
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative error guarantees (the DDSketch layout).
+    Positive values are counted in logarithmic buckets [gamma^(i-1), gamma^i); zero and below go to
+    a separate count. Merging adds bucket counts, so a merged sketch is exactly the sketch of all the
+    values, whatever the order they were added or merged in.
+    """
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum()) + self.zero_count
+
+    def _add_counts(self, indexes: np.ndarray, counts: np.ndarray) -> None:
+        if not len(indexes):
+            return
+        low = min(int(indexes.min()), self.offset if len(self.counts) else int(indexes.min()))
+        high = max(int(indexes.max()), self.offset + len(self.counts) - 1)
+        if low != self.offset or high - low + 1 != len(self.counts):
+            grown = np.zeros(high - low + 1, dtype=np.int64)
+            grown[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+            self.counts, self.offset = grown, low
+        self.counts += np.bincount(indexes - low, weights=counts, minlength=len(self.counts)).astype(np.int64)
+
+    def add_many(self, values: Iterable[float]) -> "QuantileSketch":
+        values = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.float64)
+        if not len(values):
+            return self
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        # Indexes are stored as int16; at 1% accuracy that covers values from 1e-285 to 1e285
+        indexes = np.clip(np.ceil(np.log(positive) / self._log_gamma), -32768, 32767).astype(np.int64)
+        self._add_counts(indexes, np.ones(len(indexes)))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.sum += float(values.sum())
+        return self
+
+    def add(self, value: float) -> "QuantileSketch":
+        return self.add_many([float(value)])
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        nonzero = np.flatnonzero(other.counts)
+        self._add_counts(nonzero + other.offset, other.counts[nonzero])
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns the value at rank q * (count - 1), or None for an empty sketch.
+        """
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        if rank < self.zero_count:
+            return max(min(0.0, self.max), self.min)
+        bucket = int(np.searchsorted(np.cumsum(self.counts), rank - self.zero_count, side="right"))
+        # The middle of the bucket, in relative terms, is within relative_accuracy of anything in it
+        value = 2 * self.gamma ** (self.offset + bucket) / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def to_bytes(self) -> bytes:
+        """
+        Header followed by the non-empty buckets as int16 indexes and uint32 counts.
+        """
+        nonzero = np.flatnonzero(self.counts)
+        header = _HEADER.pack(_VERSION, self.relative_accuracy, self.zero_count, self.min, self.max, self.sum, len(nonzero))
+        return header + (nonzero + self.offset).astype("<i2").tobytes() + self.counts[nonzero].astype("<u4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        version, accuracy, zero_count, low, high, total, buckets = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unknown sketch version {version}")
+        sketch = cls(accuracy)
+        indexes = np.frombuffer(data, dtype="<i2", count=buckets, offset=_HEADER.size).astype(np.int64)
+        counts = np.frombuffer(data, dtype="<u4", count=buckets, offset=_HEADER.size + 2 * buckets)
+        sketch._add_counts(indexes, counts)
+        sketch.zero_count, sketch.min, sketch.max, sketch.sum = zero_count, low, high, total
+        return sketch
+
+
+def merge_sketches(blobs: Iterable[bytes]) -> QuantileSketch:
+    """
+    Merges serialized sketches by decoding all their headers and all their buckets with one
+    frombuffer each, then adding the buckets with a single bincount.
+    Raises ValueError if they were built with different accuracies (rebuild them after changing it).
+    """
+    blobs = list(blobs)
+    if not blobs:
+        return QuantileSketch()
+    size = _HEADER.size
+    headers = np.frombuffer(b"".join(data[:size] for data in blobs), dtype=_HEADER_DTYPE)
+    if (headers["version"] != _VERSION).any():
+        raise ValueError("Unknown sketch version")
+    accuracy = float(headers["accuracy"][0])
+    if (headers["accuracy"] != accuracy).any():
+        raise ValueError("Cannot merge sketches with different accuracy")
+
+    indexes, counts = [], []
+    for data, buckets in zip(blobs, headers["buckets"].tolist()):
+        middle = size + 2 * buckets
+        indexes.append(data[size:middle])
+        counts.append(data[middle:middle + 4 * buckets])
+    merged = QuantileSketch(accuracy)
+    merged._add_counts(np.frombuffer(b"".join(indexes), dtype="<i2").astype(np.int64), np.frombuffer(b"".join(counts), dtype="<u4"))
+    merged.zero_count = int(headers["zero_count"].sum())
+    merged.min = float(headers["min"].min())
+    merged.max = float(headers["max"].max())
+    merged.sum = float(headers["sum"].sum())
+    return merged
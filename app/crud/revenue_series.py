@@ -0,0 +1,157 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+SERIES_PERIODS = ("day", "week", "month")
+
+# Periods between a bucket and the same bucket a year earlier; 364 days keep weekdays aligned.
+# A week's counterpart is the week with the same number a year earlier, at most 53 weeks back.
+YEAR_LAG = {"day": 364, "week": 53, "month": 12}
+
+# datetime64 covers any year, but only days in this range convert back to datetime.date
+_FIRST_DAY = np.datetime64(date.min)
+_LAST_DAY = np.datetime64(date.max)
+
+
+def _bucket(days: np.ndarray, period: str) -> np.ndarray:
+    """
+    Maps datetime64[D] days to the start of their bucket: the day, its week or its month.
+    Weeks are MySQL WEEK() mode 0 weeks, as /sales/revenue/ groups them: they start on Sunday and the
+    days of a year before its first Sunday are week 0, so a week spanning New Year is split at January 1st.
+    """
+    if period == "day":
+        return days
+    if period == "week":
+        # 1970-01-01 was a Thursday, so (n + 4) % 7 is the weekday with Sunday = 0
+        sunday = days - ((days.astype(np.int64) + 4) % 7).astype("timedelta64[D]")
+        return np.maximum(sunday, days.astype("datetime64[Y]").astype("datetime64[D]"))
+    return days.astype("datetime64[M]").astype("datetime64[D]")
+
+
+def _buckets(first: np.datetime64, last: np.datetime64, period: str) -> np.ndarray:
+    """
+    Every bucket start from first to last inclusive, both already bucket starts.
+    """
+    if period == "month":
+        return np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1).astype("datetime64[D]")
+    if period == "week":
+        return np.unique(_bucket(np.arange(first, last + 1, dtype="datetime64[D]"), period))
+    return np.arange(first, last + 1, dtype="datetime64[D]")
+
+
+def _week_keys(buckets: np.ndarray) -> np.ndarray:
+    """
+    year * 100 + mode 0 week number of each week bucket start, the key /sales/revenue/ labels 'YYYY-Www'.
+    """
+    years = buckets.astype("datetime64[Y]")
+    yday = (buckets - years.astype("datetime64[D]")).astype(np.int64)
+    weekday = (buckets.astype(np.int64) + 4) % 7
+    return (years.astype(np.int64) + 1970) * 100 + (yday + 7 - weekday) // 7
+
+
+def series_window(period: str, start: date, end: date, rolling: Optional[int], yoy: bool) -> Tuple[date, date]:
+    """
+    Returns the day range of daily totals needed for the series: whole periods covering start to end,
+    widened backwards by the rolling window and the year-over-year lag, and clipped to the days
+    datetime.date can hold (buckets before year 1 count as "not enough history").
+    """
+    if period not in SERIES_PERIODS:
+        raise ValueError("Invalid period")
+    first = _bucket(np.array([start], dtype="datetime64[D]"), period)[0]
+    back = max((rolling or 1) - 1, YEAR_LAG[period] if yoy else 0)
+    if period == "month":
+        first = (first.astype("datetime64[M]") - back).astype("datetime64[D]")
+    else:
+        # back weeks of days hold back Sundays, so at least back buckets even where New Year splits one
+        first = first - back * (7 if period == "week" else 1)
+    last = _bucket(np.array([end], dtype="datetime64[D]"), period)[0]
+    if period == "month":
+        last = (last.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+    elif period == "week":
+        # To the Saturday, or December 31st when the week is split
+        last = min(last + 6, (last.astype("datetime64[Y]") + 1).astype("datetime64[D]") - 1)
+    return max(first, _FIRST_DAY).astype(date), min(last, _LAST_DAY).astype(date)
+
+
+def series_points(period: str, start: date, end: date, rolling: Optional[int], yoy: bool) -> int:
+    """
+    Returns the number of buckets revenue_series() computes for the request, lookback included.
+    """
+    first, _ = series_window(period, start, end, rolling, yoy)
+    lo = _bucket(np.array([first], dtype="datetime64[D]"), period)[0]
+    hi = _bucket(np.array([end], dtype="datetime64[D]"), period)[0]
+    if period == "month":
+        return int((hi.astype("datetime64[M]") - lo.astype("datetime64[M]")).astype(np.int64)) + 1
+    if period == "day":
+        return int((hi - lo).astype(np.int64)) + 1
+    # lo, then every later Sunday and every later January 1st that is not a Sunday
+    lo_n, hi_n = int(lo.astype(np.int64)), int(hi.astype(np.int64))
+    sundays = (hi_n + 4) // 7 - (lo_n + 4) // 7
+    years = np.arange(lo.astype("datetime64[Y]") + 1, hi.astype("datetime64[Y]") + 1).astype("datetime64[D]").astype(np.int64)
+    return 1 + sundays + int(((years + 4) % 7 != 0).sum())
+
+
+def revenue_series(
+    days: Sequence[date],
+    revenue: Sequence[float],
+    period: str,
+    start: date,
+    end: date,
+    rolling: Optional[int] = None,
+    cumulative: bool = False,
+    yoy: bool = False,
+) -> List[Dict]:
+    """
+    Builds a dense series from daily totals (days need not be sorted or complete) for every
+    whole period overlapping start to end: {"period", "revenue"} plus, when asked for, the trailing
+    rolling mean over `rolling` buckets, the running total from start, and the same bucket a
+    year earlier with the change in percent. Every column is computed on whole arrays.
+    """
+    first, last = series_window(period, start, end, rolling, yoy)
+    lo = _bucket(np.array([first], dtype="datetime64[D]"), period)[0]
+    hi = _bucket(np.array([end], dtype="datetime64[D]"), period)[0]
+    buckets = _buckets(lo, hi, period)
+
+    day_array = np.array(days, dtype="datetime64[D]")
+    values = np.asarray(revenue, dtype=np.float64)
+    keep = (day_array >= np.datetime64(first)) & (day_array <= np.datetime64(last))
+    slots = np.searchsorted(buckets, _bucket(day_array[keep], period))
+    totals = np.bincount(slots, weights=values[keep], minlength=len(buckets))
+
+    # Buckets before `shown` only feed the windows of the requested range
+    shown = int(np.searchsorted(buckets, _bucket(np.array([start], dtype="datetime64[D]"), period)[0]))
+    columns = {
+        "period": buckets[shown:].astype(date).tolist(),
+        "revenue": np.round(totals[shown:], 2).tolist(),
+    }
+    if rolling:
+        running = np.concatenate(([0.0], np.cumsum(totals)))
+        means = (running[rolling:] - running[:-rolling]) / rolling
+        # means[i] covers buckets i .. i + rolling - 1; align each to its last bucket
+        aligned = np.full(len(totals), np.nan)
+        aligned[rolling - 1:] = means
+        columns["rolling_mean"] = np.round(aligned[shown:], 2).tolist()
+    if cumulative:
+        columns["cumulative"] = np.round(np.cumsum(totals[shown:]), 2).tolist()
+    if yoy:
+        previous = np.full(len(totals), np.nan)
+        if period == "week":
+            keys = _week_keys(buckets)
+            slot_of = {key: slot for slot, key in enumerate(keys.tolist())}
+            earlier = np.array([slot_of.get(key - 100, -1) for key in keys.tolist()], dtype=np.int64)
+            # A week 53 (or a week 0) with no counterpart a year earlier has no previous value
+            previous[earlier >= 0] = totals[earlier[earlier >= 0]]
+        else:
+            lag = YEAR_LAG[period]
+            previous[lag:] = totals[:-lag]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(previous > 0, (totals - previous) / previous * 100, np.nan)
+        columns["previous_year"] = np.round(previous[shown:], 2).tolist()
+        columns["yoy_pct"] = np.round(change[shown:], 2).tolist()
+
+    names = list(columns)
+    # NaN marks "not enough history" and is returned as null
+    return [
+        {name: (None if isinstance(value, float) and value != value else value) for name, value in zip(names, row)}
+        for row in zip(*columns.values())
+    ]
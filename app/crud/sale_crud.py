@@ -1,140 +1,523 @@
-from sqlalchemy.orm import Session
-from datetime import date
-from typing import List, Tuple, Dict
-from sqlalchemy import func
-from app.models.models import Sale, Product, Category
-from app.schemas.schemas import SaleCreate
+from sqlalchemy.orm import Session, joinedload
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Tuple, Dict, Optional
+from sqlalchemy import case, func, insert, literal, or_, select, tuple_
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from app.models.models import Sale, Product, Category, SalesDailyRollup, SalesDailySketch
+from app.schemas.schemas import SaleBase, SaleCreate
+from app.crud.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.crud.export import EXPORT_BATCH_SIZE
+from app.crud.product_crud import get_product
+from app.crud.revenue_series import revenue_series, series_window
+from app.crud.sales_engine import sales_engine
+from app.crud.leaderboard import leaderboards
+from app.crud.category_crud import get_category
+from app.crud.quantile_sketch import QuantileSketch, merge_sketches
+from app.crud.sales_sketches import day_sketches
+from app.crud.upsert import insert_missing, upsert_add
+from app.crud.data_version import CATALOG, SALES, bump_version, catalog_stamp_async, version_subquery
+import asyncio
 
 def get_sale(db: Session, sale_id: int) -> Sale:
     return db.query(Sale).filter(Sale.id == sale_id).first()
 
-def list_sales(db: Session) -> List[Tuple[str, str, int, float]]:
+def list_sales(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Tuple[str, str, int, float, int]], Optional[str]]:
     """
-    Returns list of (Product, Category, items_sold, total_revenue).
-    Calculate total revenue for all Products
+    Returns (rows, next_cursor) where rows are (Product, Category, items_sold, total_revenue, product_id).
+    Calculate total revenue for all Products, one page of products at a time ordered by name
     """
-    return (
+    query = (
         db.query(
             Product.name.label("product_name"),
             Category.name.label("category_name"),
-            func.sum(Sale.quantity).label("units_sold"),
-            func.sum(Sale.total_amount).label("revenue")
+            func.sum(SalesDailyRollup.units).label("units_sold"),
+            func.sum(SalesDailyRollup.revenue).label("revenue"),
+            Product.id.label("product_id")
         )
-        .join(Product, Sale.product_id == Product.id)
-        .join(Category, Product.category_id == Category.id)
+        .join(Product, SalesDailyRollup.product_id == Product.id)
+        .join(Category, SalesDailyRollup.category_id == Category.id)
         .group_by(Product.id, Product.name)
-        .order_by(Product.name)
-        .all()
     )
+    return paginate(query, Product.name, Product.id, cursor, limit, key=lambda row: (row.product_name, row.product_id))
+
+def _add_to_rollup(db: Session, sale: Sale, category_id: Optional[int]) -> None:
+    """
+    Add a single sale to its (sale_date, product_id) bucket in sales_daily_rollup with one upsert,
+    so two first sales of a bucket cannot collide. Runs inside the caller's transaction.
+    """
+    upsert_add(db, SalesDailyRollup.__table__, [{
+        "sale_date": sale.sale_date,
+        "product_id": sale.product_id,
+        "category_id": category_id,
+        "units": sale.quantity,
+        "revenue": sale.total_amount,
+    }], keys=("sale_date", "product_id"), totals=("units", "revenue"))
+
+def _add_to_sketches(db: Session, sales: List[Tuple[date, Optional[int], int, float]]) -> None:
+    """
+    Merge (sale_date, category_id, quantity, total_amount) sales into their sales_daily_sketches rows.
+    Missing rows are first inserted empty with an upsert, then exactly the rows touched are locked and
+    merged, so concurrent writers neither collide on a new row nor lose each other's values.
+    Sales of products without a category are not sketched. Runs inside the caller's transaction.
+    """
+    groups: Dict[Tuple[date, int], Tuple[list, list]] = {}
+    for sale_date, category_id, quantity, total_amount in sales:
+        if category_id is not None:
+            quantities, amounts = groups.setdefault((sale_date, category_id), ([], []))
+            quantities.append(quantity)
+            amounts.append(float(total_amount))
+    if not groups:
+        return
+
+    # Sorted keys make concurrent bulk writers take their locks in the same order
+    keys = sorted(groups)
+    empty = QuantileSketch().to_bytes()
+    insert_missing(db, SalesDailySketch.__table__, [
+        {"sale_date": day, "category_id": category_id, "quantity_sketch": empty, "amount_sketch": empty}
+        for day, category_id in keys
+    ], keys=("sale_date", "category_id"))
+    rows = (
+        db.query(SalesDailySketch)
+          .filter(tuple_(SalesDailySketch.sale_date, SalesDailySketch.category_id).in_(keys))
+          .with_for_update()
+          .populate_existing()
+    )
+    for row in rows:
+        quantities, amounts = groups[(row.sale_date, row.category_id)]
+        row.quantity_sketch = QuantileSketch.from_bytes(row.quantity_sketch).add_many(quantities).to_bytes()
+        row.amount_sketch = QuantileSketch.from_bytes(row.amount_sketch).add_many(amounts).to_bytes()
 
 def create_sale(db: Session, sale_in: SaleCreate) -> Sale:
     data = sale_in.dict()
     data.pop("token", None)
     db_sale = Sale(**data)
     db.add(db_sale)
+    db.flush()
+    # Read in this transaction rather than from the catalog cache, which may predate another worker's move
+    category_id = db.execute(select(Product.category_id).where(Product.id == db_sale.product_id)).scalar()
+    _add_to_rollup(db, db_sale, category_id)
+    _add_to_sketches(db, [(db_sale.sale_date, category_id, db_sale.quantity, db_sale.total_amount)])
+    # Last, so the counter row is locked only for the commit
+    bump_version(db, SALES)
     db.commit()
     db.refresh(db_sale)
+    leaderboards.add(db_sale.sale_date, db_sale.product_id, category_id, db_sale.quantity, db_sale.total_amount)
     return db_sale
 
-def revenue_by_period(db: Session, period: str, start_date: date, end_date: date) -> List[Tuple[str, float]]:
+def _add_batch_to_rollup(db: Session, rows: List[dict], category_ids: Dict[int, Optional[int]]) -> None:
     """
-    Returns list of (period_label, total_revenue).
-    Example period_label: '2025-05-28' for day, '2025-W21' for week, '2025-05' for month, '2025' for year.
+    Add many sales to sales_daily_rollup with one executemany upsert, one row per (sale_date, product_id).
+    Revenue is summed as Decimal so the totals match the Numeric column to the cent.
+    Runs inside the caller's transaction.
+    """
+    buckets: Dict[Tuple[date, int], List] = {}
+    for row in rows:
+        bucket = buckets.setdefault((row["sale_date"], row["product_id"]), [0, Decimal(0)])
+        bucket[0] += row["quantity"]
+        bucket[1] += Decimal(str(row["total_amount"]))
+    # Sorted keys make concurrent bulk writers take their locks in the same order, as in _add_to_sketches
+    upsert_add(db, SalesDailyRollup.__table__, [
+        {"sale_date": day, "product_id": pid, "category_id": category_ids.get(pid), "units": units, "revenue": revenue}
+        for (day, pid), (units, revenue) in sorted(buckets.items())
+    ], keys=("sale_date", "product_id"), totals=("units", "revenue"))
+
+def create_sales_bulk(db: Session, sales_in: List[SaleBase]) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Returns (inserted_count, [(row_index, error)]).
+    Validates every product id with one IN query, inserts the valid rows with a single executemany
+    and updates the rollup, all in one transaction. Rows with errors are skipped, not fatal.
+    """
+    product_ids = {sale.product_id for sale in sales_in}
+    category_ids = dict(
+        db.query(Product.id, Product.category_id).filter(Product.id.in_(product_ids)).all()
+    ) if product_ids else {}
+
+    rows, errors = [], []
+    for index, sale in enumerate(sales_in):
+        if sale.product_id not in category_ids:
+            errors.append((index, "Product not found"))
+            continue
+        row = sale.dict()
+        row.pop("token", None)
+        rows.append(row)
+
+    if rows:
+        db.execute(insert(Sale), rows)
+        _add_batch_to_rollup(db, rows, category_ids)
+        _add_to_sketches(db, [(row["sale_date"], category_ids.get(row["product_id"]), row["quantity"], row["total_amount"]) for row in rows])
+        bump_version(db, SALES)
+        db.commit()
+        for row in rows:
+            leaderboards.add(row["sale_date"], row["product_id"], category_ids.get(row["product_id"]), row["quantity"], row["total_amount"])
+    return len(rows), errors
+
+def rebuild_sales_rollup(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """
+    Recompute sales_daily_rollup from the raw sales table.
+    Rebuilds the whole table, or only the days between start_date and end_date when given.
+    Returns the number of rollup rows written.
+    """
+    date_filter = []
+    if start_date is not None:
+        date_filter.append(Sale.sale_date >= start_date)
+    if end_date is not None:
+        date_filter.append(Sale.sale_date <= end_date)
+
+    stale = db.query(SalesDailyRollup)
+    if start_date is not None:
+        stale = stale.filter(SalesDailyRollup.sale_date >= start_date)
+    if end_date is not None:
+        stale = stale.filter(SalesDailyRollup.sale_date <= end_date)
+    stale.delete(synchronize_session=False)
+
+    source = (
+        select(
+            Sale.sale_date,
+            Sale.product_id,
+            Product.category_id,
+            func.sum(Sale.quantity),
+            func.sum(Sale.total_amount)
+        )
+        .join(Product, Sale.product_id == Product.id)
+        .where(*date_filter)
+        .group_by(Sale.sale_date, Sale.product_id, Product.category_id)
+    )
+    result = db.execute(
+        insert(SalesDailyRollup).from_select(
+            ["sale_date", "product_id", "category_id", "units", "revenue"], source
+        )
+    )
+    bump_version(db, SALES)
+    db.commit()
+    return result.rowcount
+
+def rebuild_sales_sketches(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+    """
+    Recompute sales_daily_sketches from the raw sales table, one day at a time so memory stays bounded.
+    Rebuilds every day with sales, or only the days between start_date and end_date when given.
+    Returns the number of sketch rows written.
     """
+    first, last = db.query(func.min(Sale.sale_date), func.max(Sale.sale_date)).one()
+    stale = db.query(SalesDailySketch)
+    if start_date is not None:
+        stale = stale.filter(SalesDailySketch.sale_date >= start_date)
+    if end_date is not None:
+        stale = stale.filter(SalesDailySketch.sale_date <= end_date)
+    stale.delete(synchronize_session=False)
+    bump_version(db, SALES)
+    if first is None:
+        db.commit()
+        return 0
+
+    written = 0
+    day, last = max(first, start_date or first), min(last, end_date or last)
+    while day <= last:
+        rows = day_sketches(db, day)
+        if rows:
+            db.execute(insert(SalesDailySketch), rows)
+            written += len(rows)
+        day += timedelta(days=1)
+    db.commit()
+    return written
+
+def _revenue_by_period_stmt(period: str, start_date: date, end_date: date) -> Select:
+    day = SalesDailyRollup.sale_date
     fld = None
     if period == "day":
-        fld = func.date(Sale.sale_date)
+        fld = func.date(day)
     elif period == "week":
-        fld = func.concat(func.year(Sale.sale_date), "-W", func.week(Sale.sale_date))
+        fld = func.concat(func.year(day), "-W", func.week(day))
     elif period == "month":
-        fld = func.date_format(Sale.sale_date, "%Y-%m")
+        fld = func.date_format(day, "%Y-%m")
     elif period == "year":
-        fld = func.year(Sale.sale_date)
+        fld = func.year(day)
     else:
         raise ValueError("Invalid period")
 
-    rows = (
-        db.query(fld.label("period"), func.sum(Sale.total_amount).label("revenue"))
-          .filter(Sale.sale_date.between(start_date, end_date))
+    return (
+        select(fld.label("period"), func.sum(SalesDailyRollup.revenue).label("revenue"))
+          .where(day.between(start_date, end_date))
           .group_by("period")
           .order_by("period")
-          .all()
     )
-    return rows 
 
-def revenue_comparison(db: Session, start1: date, end1: date, start2: date, end2: date) -> Dict[str, float]:
+def _daily_revenue_stmt(start_date: date, end_date: date) -> Select:
+    return (
+        select(SalesDailyRollup.sale_date, func.sum(SalesDailyRollup.revenue))
+          .where(SalesDailyRollup.sale_date.between(start_date, end_date))
+          .group_by(SalesDailyRollup.sale_date)
+    )
+
+def _top_sellers_stmt(by: str, group: str, n: int, start_date: date, end_date: date, category_id: Optional[int]) -> Select:
+    units = func.sum(SalesDailyRollup.units).label("units_sold")
+    revenue = func.sum(SalesDailyRollup.revenue).label("revenue")
+    if group == "category":
+        stmt = (
+            select(Category.id, Category.name, literal(None).label("category_name"), units, revenue)
+            .join(Category, SalesDailyRollup.category_id == Category.id)
+            .group_by(Category.id, Category.name)
+        )
+        tie_breaker = Category.id
+    else:
+        stmt = (
+            select(Product.id, Product.name, Category.name.label("category_name"), units, revenue)
+            .join(Product, SalesDailyRollup.product_id == Product.id)
+            .join(Category, SalesDailyRollup.category_id == Category.id)
+            .group_by(Product.id, Product.name, Category.name)
+        )
+        tie_breaker = Product.id
+    if category_id is not None:
+        stmt = stmt.where(SalesDailyRollup.category_id == category_id)
+    return (
+        stmt.where(SalesDailyRollup.sale_date.between(start_date, end_date))
+            .order_by((revenue if by == "revenue" else units).desc(), tie_breaker)
+            .limit(n)
+    )
+
+def _revenue_comparison_stmt(intervals: List[Tuple[date, date]]) -> Select:
+    # One SUM(CASE ...) column per interval over the union of the ranges: a single pass for any N
+    day = SalesDailyRollup.sale_date
+    totals = [
+        func.coalesce(func.sum(case((day.between(start, end), SalesDailyRollup.revenue), else_=0)), 0).label(f"p{i}")
+        for i, (start, end) in enumerate(intervals)
+    ]
+    return select(*totals).where(or_(*[day.between(start, end) for start, end in intervals]))
+
+def _sales_by_period_category_stmt(start_date: date, end_date: date) -> Select:
+    return (
+        select(
+            Category.name.label("category"),
+            func.sum(SalesDailyRollup.units).label("units_sold"),
+            func.sum(SalesDailyRollup.revenue).label("revenue")
+        )
+        .join(Category, Category.id == SalesDailyRollup.category_id)
+        .where(SalesDailyRollup.sale_date.between(start_date, end_date))
+        .group_by(Category.name)
+    )
+
+def _sales_by_product_stmt(start_date: date, end_date: date, product_id: int) -> Select:
+    return (
+        select(
+            Product.name.label("product_name"),
+            Category.name.label("category_name"),
+            func.sum(SalesDailyRollup.units).label("units_sold"),
+            func.sum(SalesDailyRollup.revenue).label("total_revenue")
+        )
+        .join(Product, SalesDailyRollup.product_id == Product.id)
+        .join(Category, SalesDailyRollup.category_id == Category.id)
+        .where(SalesDailyRollup.sale_date.between(start_date, end_date))
+        .where(SalesDailyRollup.product_id == product_id)
+        .group_by(Product.id, Product.name)
+        .order_by(Product.name)
+    )
+
+def _sales_by_category_stmt(start_date: date, end_date: date, category_id: int) -> Select:
+    return (
+        select(
+            Category.name.label("category_name"),
+            func.sum(SalesDailyRollup.units).label("units_sold"),
+            func.sum(SalesDailyRollup.revenue).label("total_revenue")
+        )
+        .join(Category, SalesDailyRollup.category_id == Category.id)
+        .where(SalesDailyRollup.sale_date.between(start_date, end_date))
+        .where(SalesDailyRollup.category_id == category_id)
+        .group_by(Category.id, Category.name)
+        .order_by(Category.name)
+    )
+
+def revenue_by_period(db: Session, period: str, start_date: date, end_date: date) -> List[Tuple[str, float]]:
     """
     Returns list of (period_label, total_revenue).
-    Compare total revenue between two intervals.
+    Example period_label: '2025-05-28' for day, '2025-W21' for week, '2025-05' for month, '2025' for year.
     """
-    rev1 = db.query(func.sum(Sale.total_amount)).filter(Sale.sale_date.between(start1, end1)).scalar() or 0
-    rev2 = db.query(func.sum(Sale.total_amount)).filter(Sale.sale_date.between(start2, end2)).scalar() or 0
-    return {"period1": float(rev1), "period2": float(rev2)}
+    return db.execute(_revenue_by_period_stmt(period, start_date, end_date)).all()
+
+def revenue_comparison(db: Session, intervals: List[Tuple[date, date]]) -> List[float]:
+    """
+    Returns total revenue for each (start_date, end_date) interval, in the same order.
+    Compare total revenue between any number of intervals with one query.
+    """
+    row = db.execute(_revenue_comparison_stmt(intervals)).one()
+    return [float(total) for total in row]
 
 def sales_by_period_category(db: Session, start_date: date, end_date: date) -> List[Tuple[str, int, float]]:
     """
     Returns list of (Category, items_sold, total_revenue).
     Compare total revenue between interval and categories
     """
-    rows = (
-        db.query(
-            Category.name.label("category"),
-            func.sum(Sale.quantity).label("units_sold"),
-            func.sum(Sale.total_amount).label("revenue")
-        )
-        .join(Product, Product.id == Sale.product_id)
-        .join(Category, Category.id == Product.category_id)
-        .filter(Sale.sale_date.between(start_date, end_date))
-        .group_by(Category.name)
-        .all()
-    )
+    return db.execute(_sales_by_period_category_stmt(start_date, end_date)).all()
+
+def top_sellers(db: Session, by: str, group: str, n: int, start_date: date, end_date: date, category_id: Optional[int] = None) -> List[Tuple[int, str, Optional[str], int, float]]:
+    """
+    Returns the n best (id, name, category_name, units_sold, revenue) products or categories between
+    start_date and end_date, ranked by revenue or units in the database with ORDER BY ... LIMIT.
+    """
+    return db.execute(_top_sellers_stmt(by, group, n, start_date, end_date, category_id)).all()
+
+def top_sellers_window(db: Session, window: str, by: str, group: str, n: int, category_id: Optional[int] = None) -> List[Tuple[int, str, Optional[str], int, float]]:
+    """
+    top_sellers for a rolling window (today, 7d, 30d) from the in-memory leaderboards.
+    Names come from the catalog cache, so a warm read runs no SQL.
+    """
+    leaderboards.ensure(db)
+    rows = []
+    for row_id, units, revenue in leaderboards.top(window, by, group, n, category_id):
+        if group == "category":
+            category = get_category(db, row_id)
+            rows.append((row_id, category.name if category else None, None, units, revenue))
+        else:
+            product = get_product(db, row_id)
+            rows.append((row_id, product.name if product else None, product.category.name if product else None, units, revenue))
     return rows
 
-def get_sales_by_date_range(db: Session, start_date: date, end_date: date) -> List[Sale]:
+def get_sales_by_date_range(db: Session, start_date: date, end_date: date, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Sale], Optional[str]]:
+    """
+    Returns (Sales, next_cursor).
+    Give Sale data between date Range, one page at a time ordered by sale date
+    """
+    query = (
+        db.query(Sale)
+          .options(joinedload(Sale.product).joinedload(Product.category))
+          .filter(Sale.sale_date.between(start_date, end_date))
+    )
+    return paginate(query, Sale.sale_date, Sale.id, cursor, limit)
+
+def stream_sales_by_date_range(db: Session, start_date: date, end_date: date, batch_size: int = EXPORT_BATCH_SIZE) -> Result:
     """
-    Returns list of Sales.
-    Give Sale data between date Range
+    Returns a server-side Result of plain sale rows between date Range, fetched batch_size rows at a time.
     """
-    return db.query(Sale).filter(Sale.sale_date.between(start_date, end_date)).order_by(Sale.sale_date).all()
+    stmt = (
+        select(Sale.id, Sale.product_id, Sale.sale_date, Sale.quantity, Sale.total_amount, Sale.created_at)
+        .where(Sale.sale_date.between(start_date, end_date))
+        .order_by(Sale.sale_date, Sale.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    return db.execute(stmt)
 
 def get_sales_by_product(db: Session, start_date: date, end_date: date, product_id: int) -> List[Tuple[str, str, int, float]]:
     """
     Returns list of (Product, Category, items_sold, total_revenue).
     Calculate total revenue between interval and for specific Product
     """
-    return (
-        db.query(
-            Product.name.label("product_name"),
-            Category.name.label("category_name"),
-            func.sum(Sale.quantity).label("units_sold"),
-            func.sum(Sale.total_amount).label("total_revenue")
-        )
-        .join(Product, Sale.product_id == Product.id)
-        .join(Category, Product.category_id == Category.id)
-        .filter(Sale.sale_date.between(start_date, end_date))
-        .filter(Product.id == product_id)
-        .group_by(Product.id, Product.name)
-        .order_by(Product.name)
-        .all()
-    )
+    return db.execute(_sales_by_product_stmt(start_date, end_date, product_id)).all()
 
 def get_sales_by_category(db: Session, start_date: date, end_date: date, category_id: int) -> List[Tuple[str, int, float]]:
     """
     Returns list of (Category, items_sold, total_revenue).
     Calculate total revenue between interval and for specific Category
     """
-    return (
-        db.query(
-            Category.name.label("category_name"),
-            func.sum(Sale.quantity).label("units_sold"),
-            func.sum(Sale.total_amount).label("total_revenue")
-        )
-        .join(Product, Sale.product_id == Product.id)
-        .join(Category, Product.category_id == Category.id)
-        .filter(Sale.sale_date.between(start_date, end_date))
-        .filter(Category.id == category_id)
-        .group_by(Category.id, Category.name)
-        .order_by(Category.name)
-        .all()
+    return db.execute(_sales_by_category_stmt(start_date, end_date, category_id)).all()
+
+# --- Async variants of the analytics reads, sharing the statements above ---
+
+async def sales_stamp_async(db: AsyncSession) -> Tuple:
+    """
+    Returns the stored sales and catalog versions. Every sale insert and every rollup or sketch rebuild
+    bumps the sales version in its own transaction, so unlike MAX(sales.id) it also moves when a lower
+    id commits after a higher one; product moves re-attribute rollup rows and bump the catalog version.
+    """
+    return tuple((await db.execute(select(version_subquery(SALES), version_subquery(CATALOG)))).one())
+
+async def _engine_async(db: AsyncSession):
+    # The in-memory engine answers once it has loaded; until then, and when it is disabled, SQL does
+    if not sales_engine.ready:
+        return None
+    await sales_engine.catch_up_async(db)
+    # Reading the stored catalog version bumps catalog_cache after another worker's catalog write
+    await catalog_stamp_async(db)
+    await sales_engine.refresh_catalog_async(db)
+    return sales_engine
+
+async def revenue_by_period_async(db: AsyncSession, period: str, start_date: date, end_date: date) -> List[Tuple[str, float]]:
+    columns = await _engine_async(db)
+    if columns is not None:
+        return columns.revenue_by_period(period, start_date, end_date)
+    return (await db.execute(_revenue_by_period_stmt(period, start_date, end_date))).all()
+
+async def revenue_series_async(db: AsyncSession, period: str, start_date: date, end_date: date, rolling: Optional[int] = None, cumulative: bool = False, yoy: bool = False) -> List[Dict]:
+    """
+    Returns the gap-filled revenue series of revenue_series() for start_date to end_date.
+    Only the daily totals come from SQL; bucketing and windows are computed in NumPy.
+    """
+    first, last = series_window(period, start_date, end_date, rolling, yoy)
+    rows = (await db.execute(_daily_revenue_stmt(first, last))).all()
+    return revenue_series([day for day, _ in rows], [float(total) for _, total in rows], period, start_date, end_date, rolling, cumulative, yoy)
+
+DISTRIBUTION_GROUPS = ("total", "day", "category")
+
+def _summarize_sketches(rows: list, group: str) -> List[Dict]:
+    """
+    Merges the sketch rows of each group (total, day or category) and reads their quantiles.
+    """
+    groups: Dict[object, List] = {}
+    for row in rows:
+        key = None if group == "total" else row.sale_date if group == "day" else row.category_id
+        groups.setdefault(key, []).append(row)
+    if group == "total":
+        groups.setdefault(None, [])
+
+    result = []
+    for key in sorted(groups, key=lambda key: (key is None, key)):
+        members = groups[key]
+        item = {"sales": 0}
+        if group == "day":
+            item["day"] = key
+        elif group == "category":
+            item["category_id"], item["category"] = key, members[0].category_name
+        for field, column in (("quantity", "quantity_sketch"), ("total_amount", "amount_sketch")):
+            sketch = merge_sketches(getattr(row, column) for row in members)
+            item["sales"] = sketch.count
+            values = {
+                "min": sketch.min if sketch.count else None,
+                "p50": sketch.quantile(0.5),
+                "p90": sketch.quantile(0.9),
+                "p99": sketch.quantile(0.99),
+                "max": sketch.max if sketch.count else None,
+                "mean": sketch.sum / sketch.count if sketch.count else None,
+            }
+            item[field] = {name: None if value is None else round(value, 2) for name, value in values.items()}
+        result.append(item)
+    return result
+
+async def sales_distribution_async(db: AsyncSession, start_date: date, end_date: date, group: str = "total", category_id: Optional[int] = None) -> List[Dict]:
+    """
+    Returns p50/p90/p99 (plus min, max and mean) of quantity and total_amount per sale between start_date
+    and end_date, for the whole range or per day or category, by merging the daily sketches.
+    Quantiles are within SKETCH_RELATIVE_ACCURACY of an exact one; sales without a category are not counted.
+    """
+    if group not in DISTRIBUTION_GROUPS:
+        raise ValueError("Invalid group")
+    stmt = (
+        select(SalesDailySketch.sale_date, SalesDailySketch.category_id, Category.name.label("category_name"), SalesDailySketch.quantity_sketch, SalesDailySketch.amount_sketch)
+        .join(Category, SalesDailySketch.category_id == Category.id)
+        .where(SalesDailySketch.sale_date.between(start_date, end_date))
     )
+    if category_id is not None:
+        stmt = stmt.where(SalesDailySketch.category_id == category_id)
+    rows = (await db.execute(stmt)).all()
+    return await asyncio.to_thread(_summarize_sketches, rows, group)
+
+async def revenue_comparison_async(db: AsyncSession, intervals: List[Tuple[date, date]]) -> List[float]:
+    row = (await db.execute(_revenue_comparison_stmt(intervals))).one()
+    return [float(total) for total in row]
+
+async def sales_by_period_category_async(db: AsyncSession, start_date: date, end_date: date) -> List[Tuple[str, int, float]]:
+    columns = await _engine_async(db)
+    if columns is not None:
+        return columns.sales_by_period_category(start_date, end_date)
+    return (await db.execute(_sales_by_period_category_stmt(start_date, end_date))).all()
+
+async def get_sales_by_product_async(db: AsyncSession, start_date: date, end_date: date, product_id: int) -> List[Tuple[str, str, int, float]]:
+    columns = await _engine_async(db)
+    if columns is not None:
+        return columns.get_sales_by_product(start_date, end_date, product_id)
+    return (await db.execute(_sales_by_product_stmt(start_date, end_date, product_id))).all()
 
+async def get_sales_by_category_async(db: AsyncSession, start_date: date, end_date: date, category_id: int) -> List[Tuple[str, int, float]]:
+    columns = await _engine_async(db)
+    if columns is not None:
+        return columns.get_sales_by_category(start_date, end_date, category_id)
+    return (await db.execute(_sales_by_category_stmt(start_date, end_date, category_id))).all()
@@ -0,0 +1,370 @@
+from sqlalchemy import BigInteger, and_, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+import logging
+import os
+import threading
+import time
+import numpy as np
+
+from app.models.models import Category, Product, Sale, SalesDailyRollup
+from app.crud.catalog_cache import catalog_cache
+
+load_dotenv()
+
+# Answer the sales analytics reads from in-memory column arrays instead of SQL
+SALES_ENGINE = os.getenv("SALES_ENGINE", "false").lower() in ("1", "true", "yes")
+# Appended rows are kept unsorted until this many have accumulated, then merged into the sorted columns
+SALES_ENGINE_MERGE_ROWS = int(os.getenv("SALES_ENGINE_MERGE_ROWS", 100000))
+SALES_ENGINE_LOAD_BATCH = 100000
+# Ids missing below the watermark may belong to transactions that commit late; each is looked for
+# again on every read for this long (a sale whose transaction takes longer is never picked up)
+SALES_ENGINE_GAP_SECONDS = float(os.getenv("SALES_ENGINE_GAP_SECONDS", 300))
+# At most this many missing ids are tracked, the highest ones
+SALES_ENGINE_MAX_GAPS = int(os.getenv("SALES_ENGINE_MAX_GAPS", 10000))
+ENGINE_PERIODS = ("day", "week", "month", "year")
+
+logger = logging.getLogger(__name__)
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_PRODUCTS = select(Product.id, Product.name, Product.category_id)
+_CATEGORIES = select(Category.id, Category.name)
+
+
+def _sales_rows(*where):
+    # (id, product_id, day, quantity, cents, rollup category or -1) per sale
+    return (
+        select(Sale.id, Sale.product_id, Sale.sale_date, Sale.quantity, cast(func.round(Sale.total_amount * 100), BigInteger), func.coalesce(SalesDailyRollup.category_id, -1))
+        .outerjoin(SalesDailyRollup, and_(SalesDailyRollup.sale_date == Sale.sale_date, SalesDailyRollup.product_id == Sale.product_id))
+        .where(*where)
+    )
+
+
+def _rollup_categories(product_ids: List[int]):
+    return (
+        select(SalesDailyRollup.product_id, SalesDailyRollup.sale_date, SalesDailyRollup.category_id)
+        .where(SalesDailyRollup.product_id.in_(product_ids))
+    )
+
+
+def _period_keys(ordinals: np.ndarray, period: str) -> Tuple[np.ndarray, Callable[[int], object]]:
+    """
+    Returns an integer key per day ordinal for the period, and a function turning a key into the same
+    label revenue_by_period gets from SQL ('2025-05-28', '2025-W21' with MySQL WEEK() mode 0, '2025-05', 2025).
+    """
+    days = (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")
+    years = days.astype("datetime64[Y]")
+    if period == "day":
+        return ordinals, lambda key: date.fromordinal(int(key)).isoformat()
+    if period == "week":
+        # Weeks start on Sunday; days before the year's first Sunday are week 0. 1970-01-01 was a Thursday.
+        yday = (days - years.astype("datetime64[D]")).astype(np.int64)
+        weekday = (days.astype(np.int64) + 4) % 7
+        keys = (years.astype(np.int64) + 1970) * 100 + (yday + 7 - weekday) // 7
+        return keys, lambda key: f"{int(key) // 100}-W{int(key) % 100}"
+    if period == "month":
+        return days.astype("datetime64[M]").astype(np.int64), lambda key: str(np.datetime64(int(key), "M"))
+    return years.astype(np.int64) + 1970, int
+
+
+class SalesEngine:
+    """
+    The sales table as NumPy columns sorted by day: product_id, day ordinal, quantity, amount in cents
+    and category id (24 bytes a row). A sale's category is the one its sales_daily_rollup row records,
+    which is what the SQL path groups by; when a product is moved to another category, its rows are
+    re-read from the rollup, which update_product has rewritten.
+
+    Loaded once per process. Before each read, sales with an id above the highest one loaded (the
+    watermark) are fetched, whichever process wrote them, along with ids skipped below it whose
+    transaction may still commit. Date ranges are found with searchsorted on the sorted days, and
+    groups are summed with bincount.
+    """
+    def __init__(self):
+        self.ready = False
+        self.watermark: Optional[int] = None
+        # missing id -> time.monotonic() when it was first missed
+        self._gaps: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._set_columns(np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.int64), np.empty(0, np.int32))
+        self._tail: List[Tuple[int, int, int, int, int]] = []
+        self._tail_columns: Optional[Tuple[np.ndarray, ...]] = None
+        self.category_of = np.empty(0, np.int32)
+        self.product_names: Dict[int, str] = {}
+        self.category_names: Dict[int, str] = {}
+        self.catalog_version: Optional[int] = None
+        self.load_seconds: Optional[float] = None
+
+    def _set_columns(self, product: np.ndarray, day: np.ndarray, quantity: np.ndarray, cents: np.ndarray, category: np.ndarray) -> None:
+        self.product, self.day, self.quantity, self.cents, self.category = product, day, quantity, cents, category
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return self.product, self.day, self.quantity, self.cents, self.category
+
+    # --- loading and catching up ---
+
+    def load(self, db: Session) -> None:
+        """
+        Read every sale into the columns. The watermark is the highest id read, and ids missing below it
+        are looked for again later, so a sale committed while loading is never lost.
+        """
+        started = time.perf_counter()
+        self.ready = False
+        stmt = _sales_rows().order_by(Sale.sale_date).execution_options(yield_per=SALES_ENGINE_LOAD_BATCH)
+        ids = [np.empty(0, np.int64)]
+        products, days, quantities, cents, categories = [np.empty(0, np.int32)], [np.empty(0, np.int32)], [np.empty(0, np.int32)], [np.empty(0, np.int64)], [np.empty(0, np.int32)]
+        for rows in db.execute(stmt).partitions():
+            ids.append(np.fromiter((row[0] for row in rows), np.int64, len(rows)))
+            products.append(np.fromiter((row[1] for row in rows), np.int32, len(rows)))
+            days.append(np.fromiter((row[2].toordinal() for row in rows), np.int32, len(rows)))
+            quantities.append(np.fromiter((row[3] for row in rows), np.int32, len(rows)))
+            cents.append(np.fromiter((row[4] for row in rows), np.int64, len(rows)))
+            categories.append(np.fromiter((row[5] for row in rows), np.int32, len(rows)))
+        columns = [np.concatenate(parts) for parts in (products, days, quantities, cents, categories)]
+        ids = np.sort(np.concatenate(ids))
+        self.refresh_catalog(db)
+        with self._lock:
+            self._set_columns(*columns)
+            self._tail = []
+            self._tail_columns = None
+            self._gaps = {}
+            self._add_gaps(ids, 0)
+            self.watermark = int(ids[-1]) if len(ids) else 0
+        self.load_seconds = time.perf_counter() - started
+        self.ready = True
+        logger.info("sales engine loaded %d rows in %.1fs", len(self.day), self.load_seconds)
+
+    def start(self, session_factory: Callable[[], Session]) -> threading.Thread:
+        """
+        Load in a background thread; reads use SQL until it is ready.
+        """
+        def run():
+            db = session_factory()
+            try:
+                self.load(db)
+            except Exception:
+                logger.exception("sales engine failed to load")
+            finally:
+                db.close()
+        thread = threading.Thread(target=run, name="sales-engine-load", daemon=True)
+        thread.start()
+        return thread
+
+    def _add_gaps(self, ids: np.ndarray, low: int) -> None:
+        """
+        Track the ids above low that are missing from the sorted ids, keeping the highest SALES_ENGINE_MAX_GAPS.
+        Caller holds the lock.
+        """
+        now = time.monotonic()
+        bounds = np.concatenate(([low], ids))
+        budget = SALES_ENGINE_MAX_GAPS
+        for hole in np.flatnonzero(np.diff(bounds) > 1)[::-1].tolist():
+            first, end = int(bounds[hole]) + 1, int(bounds[hole + 1])
+            for missing in range(max(first, end - budget), end):
+                self._gaps[missing] = now
+            budget -= end - max(first, end - budget)
+            if budget <= 0:
+                break
+        if len(self._gaps) > SALES_ENGINE_MAX_GAPS:
+            for missing in sorted(self._gaps)[:len(self._gaps) - SALES_ENGINE_MAX_GAPS]:
+                del self._gaps[missing]
+
+    def _catch_up_stmt(self):
+        with self._lock:
+            expired = time.monotonic() - SALES_ENGINE_GAP_SECONDS
+            for missing in [missing for missing, seen in self._gaps.items() if seen < expired]:
+                del self._gaps[missing]
+            watermark, gaps = self.watermark, list(self._gaps)
+        return _sales_rows(or_(Sale.id > watermark, Sale.id.in_(gaps)) if gaps else Sale.id > watermark)
+
+    def _apply(self, rows: Iterable[Tuple[int, int, date, int, int, int]]) -> None:
+        """
+        Add fetched rows not already in the columns: above the watermark, or filling a tracked gap.
+        A row fetched by two concurrent catch-ups is only added once.
+        """
+        with self._lock:
+            added, above = [], []
+            for sale_id, product_id, sale_date, quantity, cents, category_id in rows:
+                if sale_id > self.watermark:
+                    above.append(sale_id)
+                elif self._gaps.pop(sale_id, None) is None:
+                    continue
+                added.append((product_id, sale_date.toordinal(), quantity, int(cents), category_id))
+            if above:
+                above = np.sort(np.array(above, dtype=np.int64))
+                self._add_gaps(above, self.watermark)
+                self.watermark = int(above[-1])
+            if added:
+                self._tail.extend(added)
+                self._tail_columns = None
+                if len(self._tail) >= SALES_ENGINE_MERGE_ROWS:
+                    self._merge()
+
+    async def catch_up_async(self, db: AsyncSession) -> None:
+        """
+        Fetch the sales committed since the last read, by any process.
+        """
+        self._apply((await db.execute(self._catch_up_stmt())).all())
+
+    def _merge(self) -> None:
+        # Caller holds the lock
+        tail = self._tail_arrays()
+        order = np.argsort(tail[1], kind="stable")
+        tail = [column[order] for column in tail]
+        at = np.searchsorted(self.day, tail[1], side="right")
+        self._set_columns(*(np.insert(column, at, extra) for column, extra in zip(self._columns(), tail)))
+        self._tail = []
+        self._tail_columns = None
+
+    def _tail_arrays(self) -> Tuple[np.ndarray, ...]:
+        # Caller holds the lock
+        if self._tail_columns is None:
+            tail = np.array(self._tail, dtype=np.int64).reshape(-1, 5)
+            self._tail_columns = (tail[:, 0].astype(np.int32), tail[:, 1].astype(np.int32), tail[:, 2].astype(np.int32), tail[:, 3], tail[:, 4].astype(np.int32))
+        return self._tail_columns
+
+    def refresh_catalog(self, db: Session) -> None:
+        version = catalog_cache.version
+        moved = self.load_catalog(db.execute(_PRODUCTS).all(), db.execute(_CATEGORIES).all(), version)
+        if moved:
+            self.reattribute(db.execute(_rollup_categories(moved)).all())
+
+    async def refresh_catalog_async(self, db: AsyncSession) -> None:
+        """
+        Reload the catalog if a catalog write happened since it was loaded, and re-read the rollup
+        categories of the products that moved.
+        """
+        version = catalog_cache.version
+        if self.catalog_version != version:
+            moved = self.load_catalog((await db.execute(_PRODUCTS)).all(), (await db.execute(_CATEGORIES)).all(), version)
+            if moved:
+                self.reattribute((await db.execute(_rollup_categories(moved))).all())
+
+    def load_catalog(self, products: Iterable[Tuple[int, str, Optional[int]]], categories: Iterable[Tuple[int, str]], version: int) -> List[int]:
+        """
+        Replace the product -> category mapping and the names used in results, as of catalog_cache version.
+        Returns the products whose category changed since the previous mapping.
+        """
+        products = list(products)
+        category_of = np.full(max((pid for pid, _, _ in products), default=0) + 1, -1, np.int32)
+        for pid, _, category_id in products:
+            if category_id is not None:
+                category_of[pid] = category_id
+        previous = self.category_of
+        moved = []
+        if self.catalog_version is not None:
+            shared = min(len(previous), len(category_of))
+            moved = np.flatnonzero(previous[:shared] != category_of[:shared]).tolist()
+        self.category_of = category_of
+        self.product_names = {pid: name for pid, name, _ in products}
+        self.category_names = dict(categories)
+        self.catalog_version = version
+        return moved
+
+    def reattribute(self, rows: Iterable[Tuple[int, date, Optional[int]]]) -> None:
+        """
+        Set the category of every sale of the given products from their (product_id, sale_date, category_id)
+        rollup rows. Works on a copy of the column, so concurrent readers see either version whole.
+        """
+        by_product: Dict[int, Dict[int, int]] = {}
+        for product_id, sale_date, category_id in rows:
+            by_product.setdefault(product_id, {})[sale_date.toordinal()] = -1 if category_id is None else category_id
+        with self._lock:
+            if self._tail:
+                self._merge()
+            category = self.category.copy()
+            for product_id, days in by_product.items():
+                rows_of = np.flatnonzero(self.product == product_id)
+                category[rows_of] = [days.get(day, -1) for day in self.day[rows_of].tolist()]
+            self.category = category
+
+    # --- queries ---
+
+    def _between(self, start: date, end: date) -> Tuple[np.ndarray, ...]:
+        """
+        Columns of the sales from start to end inclusive: a slice of the sorted columns plus matching appended rows.
+        """
+        low, high = start.toordinal(), end.toordinal()
+        with self._lock:
+            columns = self._columns()
+            tail = self._tail_arrays() if self._tail else None
+        first, last = np.searchsorted(columns[1], low, side="left"), np.searchsorted(columns[1], high, side="right")
+        sliced = tuple(column[first:last] for column in columns)
+        if tail is None:
+            return sliced
+        keep = (tail[1] >= low) & (tail[1] <= high)
+        return tuple(np.concatenate((column, extra[keep])) for column, extra in zip(sliced, tail))
+
+    def revenue_by_period(self, period: str, start_date: date, end_date: date) -> List[Tuple[object, float]]:
+        if period not in ENGINE_PERIODS:
+            raise ValueError("Invalid period")
+        if end_date < start_date:
+            return []
+        _, day, _, cents, _ = self._between(start_date, end_date)
+        offsets = day - start_date.toordinal()
+        size = end_date.toordinal() - start_date.toordinal() + 1
+        present = np.bincount(offsets, minlength=size) > 0
+        per_day = np.bincount(offsets, weights=cents, minlength=size)
+        keys, label = _period_keys(np.arange(start_date.toordinal(), end_date.toordinal() + 1)[present], period)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=per_day[present], minlength=len(unique))
+        rows = [(label(key), round(total / 100, 2)) for key, total in zip(unique.tolist(), totals.tolist())]
+        return sorted(rows, key=lambda row: row[0])
+
+    def sales_by_period_category(self, start_date: date, end_date: date) -> List[Tuple[str, int, float]]:
+        _, _, quantity, cents, categories = self._between(start_date, end_date)
+        known = categories >= 0
+        counts = np.bincount(categories[known])
+        units = np.bincount(categories[known], weights=quantity[known], minlength=len(counts))
+        revenue = np.bincount(categories[known], weights=cents[known], minlength=len(counts))
+        # Grouped by name like the SQL, which joins categories and groups by Category.name
+        by_name: Dict[str, List[float]] = {}
+        for category_id in np.flatnonzero(counts).tolist():
+            name = self.category_names.get(category_id)
+            if name is None:
+                continue
+            total = by_name.setdefault(name, [0, 0])
+            total[0] += units[category_id]
+            total[1] += revenue[category_id]
+        return [(name, int(units), round(revenue / 100, 2)) for name, (units, revenue) in sorted(by_name.items())]
+
+    def get_sales_by_product(self, start_date: date, end_date: date, product_id: int) -> List[Tuple[str, str, int, float]]:
+        product, _, quantity, cents, categories = self._between(start_date, end_date)
+        # Like the SQL join on categories, rows without a known category are left out
+        mask = (product == product_id) & np.isin(categories, list(self.category_names))
+        if not mask.any() or product_id not in self.product_names:
+            return []
+        category_id = int(categories[mask][-1])
+        return [(self.product_names[product_id], self.category_names[category_id], int(quantity[mask].sum()), round(int(cents[mask].sum()) / 100, 2))]
+
+    def get_sales_by_category(self, start_date: date, end_date: date, category_id: int) -> List[Tuple[str, int, float]]:
+        _, _, quantity, cents, categories = self._between(start_date, end_date)
+        mask = categories == category_id
+        if not mask.any() or category_id not in self.category_names:
+            return []
+        return [(self.category_names[category_id], int(quantity[mask].sum()), round(int(cents[mask].sum()) / 100, 2))]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            gaps = len(self._gaps)
+            rows = len(self.day) + len(self._tail)
+            column_bytes = sum(column.nbytes for column in self._columns())
+            tail_rows = len(self._tail)
+        # Appended rows not merged yet are costed as if they were in the columns
+        data_bytes = column_bytes + tail_rows * 24
+        return {
+            "ready": self.ready,
+            "rows": rows,
+            "appended_unmerged": tail_rows,
+            "watermark": self.watermark,
+            "pending_gaps": gaps,
+            "column_bytes": data_bytes,
+            "catalog_bytes": self.category_of.nbytes,
+            "bytes_per_million_rows": round(data_bytes / rows * 1000000) if rows else None,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+        }
+
+
+sales_engine = SalesEngine()
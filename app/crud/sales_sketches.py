@@ -0,0 +1,54 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+import numpy as np
+from app.models.models import Sale, Product, SalesDailySketch
+from app.crud.quantile_sketch import QuantileSketch
+
+
+def day_sketches(db: Session, day: date, category_ids: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Sketches one day of sales per category of the sold product (its current one), as sales_daily_sketches rows.
+    Only the given categories when category_ids is set; sales of products without a category are skipped.
+    """
+    query = (
+        select(Product.category_id, Sale.quantity, Sale.total_amount)
+        .join(Product, Sale.product_id == Product.id)
+        .where(Sale.sale_date == day, Product.category_id.is_not(None))
+    )
+    if category_ids is not None:
+        query = query.where(Product.category_id.in_(category_ids))
+    rows = db.execute(query).all()
+    if not rows:
+        return []
+    categories, quantities, amounts = (np.array(column, dtype=dtype) for column, dtype in zip(zip(*rows), (np.int64, np.int64, np.float64)))
+    order = np.argsort(categories, kind="stable")
+    categories, quantities, amounts = categories[order], quantities[order], amounts[order]
+    bounds = np.flatnonzero(np.diff(categories)) + 1
+    return [
+        {
+            "sale_date": day,
+            "category_id": int(category[0]),
+            "quantity_sketch": QuantileSketch().add_many(quantity).to_bytes(),
+            "amount_sketch": QuantileSketch().add_many(amount).to_bytes(),
+        }
+        for category, quantity, amount in zip(np.split(categories, bounds), np.split(quantities, bounds), np.split(amounts, bounds))
+    ]
+
+
+def resketch_days(db: Session, days: Iterable[date], category_ids: List[int]) -> None:
+    """
+    Replaces the sketches of category_ids on the given days with ones recomputed from the sales table.
+    Sketches cannot take a sale back out, so this is how sales change category. Runs inside the
+    caller's transaction, in day order like _add_to_sketches, one day at a time so memory stays bounded.
+    """
+    if not category_ids:
+        return
+    for day in sorted(set(days)):
+        db.query(SalesDailySketch).filter(
+            SalesDailySketch.sale_date == day, SalesDailySketch.category_id.in_(category_ids)
+        ).delete(synchronize_session=False)
+        rows = day_sketches(db, day, category_ids)
+        if rows:
+            db.execute(insert(SalesDailySketch), rows)
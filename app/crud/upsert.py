@@ -0,0 +1,48 @@
+from sqlalchemy import Table
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from typing import Dict, List, Sequence
+
+# Dialects whose INSERT accepts a conflict clause, by dialect name
+_INSERTS = {"mysql": mysql.insert, "postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _insert(db: Session, table: Table):
+    name = db.get_bind().dialect.name
+    if name not in _INSERTS:
+        raise NotImplementedError(f"No upsert for the {name} dialect")
+    return name, _INSERTS[name](table)
+
+
+def upsert_add(db: Session, table: Table, rows: List[Dict], keys: Sequence[str], totals: Sequence[str]) -> None:
+    """
+    Insert rows, or add their `totals` columns to the row already holding the same `keys`, in one
+    statement: ON DUPLICATE KEY UPDATE on MySQL, ON CONFLICT DO UPDATE elsewhere. Concurrent writers
+    of a new key cannot both miss it and collide on the primary key.
+    Other columns keep the value of whichever row was inserted first.
+    """
+    if not rows:
+        return
+    name, stmt = _insert(db, table)
+    if name == "mysql":
+        stmt = stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in totals})
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_={column: table.c[column] + stmt.excluded[column] for column in totals})
+    db.execute(stmt, rows)
+
+
+
+def insert_missing(db: Session, table: Table, rows: List[Dict], keys: Sequence[str]) -> None:
+    """
+    Insert the rows whose `keys` are not taken yet and silently skip the others.
+    """
+    if not rows:
+        return
+    name, stmt = _insert(db, table)
+    if name == "mysql":
+        # A no-op update rather than INSERT IGNORE, which would also swallow unrelated errors
+        first = keys[0]
+        stmt = stmt.on_duplicate_key_update({first: table.c[first]})
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(keys))
+    db.execute(stmt, rows)
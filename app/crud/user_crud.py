@@ -1,7 +1,6 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta
-from typing import List, Optional
-from passlib.context import CryptContext
+from typing import List, Optional, Tuple
 from fastapi import Depends
 import jwt
 import os
@@ -9,6 +8,9 @@ from dotenv import load_dotenv
 
 from app.models.models import User, Role, UserRole
 from app.schemas.schemas import UserCreate, RoleCreate
+from app.crud.pagination import paginate, DEFAULT_PAGE_SIZE
+from app.crud.auth_cache import principal_cache
+from app.crud.password_pool import password_pool
 
 load_dotenv()
 
@@ -16,12 +18,11 @@ SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.hash(password)
     
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_pool.verify_and_update(plain_password, hashed_password)[0]
 
 def create_access_token(data: dict, roles: List[str], expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -33,9 +34,15 @@ def create_access_token(data: dict, roles: List[str], expires_delta: Optional[ti
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     user = get_user_by_username(db, username)
-    if user and verify_password(password, user.password_hash):
-        return user
-    return None
+    if not user:
+        return None
+    valid, new_hash = password_pool.verify_and_update(password, user.password_hash)
+    if not valid:
+        return None
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; the caller's commit persists the upgrade
+        user.password_hash = new_hash
+    return user
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
     return db.query(User).filter(User.id == user_id).first()
@@ -43,8 +50,9 @@ def get_user(db: Session, user_id: int) -> Optional[User]:
 def get_user_by_username(db: Session, username: str) -> Optional[User]:
     return db.query(User).filter(User.username == username).first()
 
-def list_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+def list_users(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[User], Optional[str]]:
+    query = db.query(User).options(selectinload(User.user_roles).joinedload(UserRole.role))
+    return paginate(query, User.id, User.id, cursor, limit)
 
 
 def create_user(db: Session, user_in: UserCreate) -> User:
@@ -68,6 +76,7 @@ def update_user(db: Session, user_id: int, user_in: UserCreate) -> Optional[User
     db_user.password_hash = hash_password(user_in.password)
     db_user.last_login = db_user.last_login
     db.commit()
+    principal_cache.evict_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -78,14 +87,15 @@ def delete_user(db: Session, user_id: int) -> bool:
         return False
     db.delete(db_user)
     db.commit()
+    principal_cache.evict_user(user_id)
     return True
 
 def get_role(db: Session, role_id: int) -> Optional[Role]:
     return db.query(Role).filter(Role.id == role_id).first()
 
 
-def list_roles(db: Session, skip: int = 0, limit: int = 100) -> List[Role]:
-    return db.query(Role).offset(skip).limit(limit).all()
+def list_roles(db: Session, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Role], Optional[str]]:
+    return paginate(db.query(Role), Role.id, Role.id, cursor, limit)
 
 
 def create_role(db: Session, role_in: RoleCreate) -> Role:
@@ -103,6 +113,7 @@ def update_role(db: Session, role_id: int, role_in: RoleCreate) -> Optional[Role
     db_role.name = role_in.name
     db_role.description = role_in.description
     db.commit()
+    principal_cache.clear()
     db.refresh(db_role)
     return db_role
 
@@ -113,6 +124,7 @@ def delete_role(db: Session, role_id: int) -> bool:
         return False
     db.delete(db_role)
     db.commit()
+    principal_cache.clear()
     return True
 
 def assign_role_to_user(db: Session, user_id: int, role_id: int) -> UserRole:
@@ -123,6 +135,7 @@ def assign_role_to_user(db: Session, user_id: int, role_id: int) -> UserRole:
     )
     db.add(user_role)
     db.commit()
+    principal_cache.evict_user(user_id)
     db.refresh(user_role)
     return user_role
 
@@ -145,6 +158,7 @@ def update_user_role(db: Session, user_id: int, old_role_id: int, new_role_id: i
     user_role.role_id = new_role_id
     user_role.assigned_at = datetime.utcnow()
     db.commit()
+    principal_cache.evict_user(user_id)
     db.refresh(user_role)
     return user_role
 
@@ -155,4 +169,5 @@ def delete_user_role(db: Session, user_id: int, role_id: int) -> bool:
         return False
     db.delete(user_role)
     db.commit()
+    principal_cache.evict_user(user_id)
     return True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Numeric, Date
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Numeric, Date, Index, Boolean, LargeBinary
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.ext.associationproxy import association_proxy
 import datetime
@@ -34,6 +34,10 @@ class UserRole(Base):
     role_id = Column(Integer, ForeignKey("roles.id"), primary_key=True)
     assigned_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_user_roles_role_id", "role_id"),
+    )
+
     user = relationship("User", back_populates="user_roles")
     role = relationship("Role", back_populates="user_roles")
 
@@ -57,6 +61,10 @@ class Product(Base):
 
     category = relationship("Category")
 
+    __table_args__ = (
+        Index("ix_products_category_id", "category_id"),
+    )
+
 
 class Sale(Base):
     __tablename__ = "sales"
@@ -69,6 +77,40 @@ class Sale(Base):
 
     product = relationship("Product")
 
+    __table_args__ = (
+        Index("ix_sales_sale_date", "sale_date"),
+        Index("ix_sales_product_id_sale_date", "product_id", "sale_date"),
+    )
+
+
+class SalesDailyRollup(Base):
+    __tablename__ = "sales_daily_rollup"
+    sale_date = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+    product = relationship("Product")
+
+    __table_args__ = (
+        Index("ix_sales_daily_rollup_product_id_sale_date", "product_id", "sale_date"),
+        Index("ix_sales_daily_rollup_category_id_sale_date", "category_id", "sale_date"),
+    )
+
+
+class SalesDailySketch(Base):
+    __tablename__ = "sales_daily_sketches"
+    sale_date = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    # Serialized QuantileSketch (app/crud/quantile_sketch.py) of Sale.quantity and Sale.total_amount
+    quantity_sketch = Column(LargeBinary, nullable=False)
+    amount_sketch = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sales_daily_sketches_category_id_sale_date", "category_id", "sale_date"),
+    )
+
 
 class Inventory(Base):
     __tablename__ = "inventory"
@@ -76,10 +118,17 @@ class Inventory(Base):
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity_on_hand = Column(Integer, nullable=False)
     low_stock_threshold = Column(Integer, default=10)
+    # quantity_on_hand <= low_stock_threshold, maintained by every inventory write so it can be indexed
+    is_low_stock = Column(Boolean, nullable=False, default=False)
     last_updated = Column(DateTime, default=datetime.datetime.utcnow)
 
     product = relationship("Product")
 
+    __table_args__ = (
+        Index("ux_inventory_product_id", "product_id", unique=True),
+        Index("ix_inventory_is_low_stock_id", "is_low_stock", "id"),
+    )
+
 
 class InventoryHistory(Base):
     __tablename__ = "inventory_history"
@@ -91,3 +140,36 @@ class InventoryHistory(Base):
 
     product = relationship("Product")
 
+    __table_args__ = (
+        Index("ix_inventory_history_product_id_changed_at", "product_id", "changed_at"),
+        Index("ix_inventory_history_changed_at", "changed_at"),
+    )
+
+
+# Every product's quantity_on_hand at taken_at, written by the nightly checkpoint job
+class InventoryCheckpoint(Base):
+    __tablename__ = "inventory_checkpoints"
+    taken_at = Column(DateTime, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    quantity_on_hand = Column(Integer, nullable=False)
+
+
+# Net stock change per product and day, kept for inventory history moved to the archive files
+class InventoryHistoryDaily(Base):
+    __tablename__ = "inventory_history_daily"
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    net_change = Column(Integer, nullable=False, default=0)
+    changes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_inventory_history_daily_day", "day"),
+    )
+
+
+# A counter per kind of data, bumped in the same transaction as every write to it; response ETags are
+# built from it so that every worker sees the same tag
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
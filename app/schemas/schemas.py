@@ -99,6 +99,18 @@ class Sale(SaleBase):
 
     class Config:
         orm_mode = True
+
+class SaleBulkCreate(BaseModel):
+    token: str
+    sales: List[SaleBase]
+
+class SaleBulkError(BaseModel):
+    index: int
+    detail: str
+
+class SaleBulkResult(BaseModel):
+    inserted: int
+    errors: List[SaleBulkError] = []
         
 class RevenueByPeriod(BaseModel):
     period: str
@@ -107,6 +119,52 @@ class RevenueByPeriod(BaseModel):
     class Config:
         orm_mode = True
         
+class TopSeller(BaseModel):
+    id: int
+    name: str
+    category: Optional[str] = None
+    units_sold: int
+    revenue: float
+
+class RevenueSeriesPoint(BaseModel):
+    period: date
+    revenue: float
+    rolling_mean: Optional[float] = None
+    cumulative: Optional[float] = None
+    previous_year: Optional[float] = None
+    yoy_pct: Optional[float] = None
+
+class QuantileSummary(BaseModel):
+    min: Optional[float] = None
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+
+class SalesDistribution(BaseModel):
+    day: Optional[date] = None
+    category_id: Optional[int] = None
+    category: Optional[str] = None
+    sales: int
+    quantity: QuantileSummary
+    total_amount: QuantileSummary
+
+class RevenueInterval(BaseModel):
+    start: date
+    end: date
+    revenue: float
+    baseline_start: Optional[date] = None
+    baseline_end: Optional[date] = None
+    baseline_revenue: Optional[float] = None
+    delta: Optional[float] = None
+    delta_pct: Optional[float] = None
+
+# Response of /sales/revenue/compare when called with the original start1..end2 parameters
+class RevenueComparison(BaseModel):
+    period1: float
+    period2: float
+        
 class RevenueByCategory(BaseModel):
     category: str
     units_sold: int
@@ -137,6 +195,7 @@ class InventoryCreate(InventoryBase):
 
 class Inventory(InventoryBase):
     id: int
+    is_low_stock: bool = False
     last_updated: datetime
     product: Product
 
@@ -159,3 +218,10 @@ class InventoryHistory(InventoryHistoryBase):
     class Config:
         orm_mode = True
 
+class InventoryAsOf(BaseModel):
+    product_id: int
+    quantity_on_hand: int
+
+    class Config:
+        orm_mode = True
+
@@ -0,0 +1,44 @@
+"""
+Dataset helpers for the endpoint benchmarks. Rows come from scripts/generate_data.py with a fixed
+end date, so the same (scale, seed) describes the same data on every run and machine.
+"""
+import datetime
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from scripts.generate_data import ADMIN_PASSWORD, ADMIN_USERNAME, Scale, generate
+
+END_DATE = datetime.date(2025, 12, 31)
+
+
+def build_dataset(engine: Engine, scale: Scale, seed: int, workers: int = 0, log=print) -> None:
+    generate(engine, scale, seed, END_DATE, workers, log)
+
+
+def register_mysql_functions(engine: Engine) -> None:
+    """
+    The revenue queries use MySQL date functions; give SQLite connections equivalents so those routes can be driven too.
+    """
+    def year(value):
+        return None if value is None else int(value[:4])
+
+    def week(value):
+        # MySQL WEEK() default mode 0: weeks start on Sunday, 0-53
+        return None if value is None else int(datetime.date.fromisoformat(value[:10]).strftime("%U"))
+
+    def date_format(value, fmt):
+        return None if value is None else datetime.date.fromisoformat(value[:10]).strftime(fmt)
+
+    def concat(*parts):
+        return None if any(part is None for part in parts) else "".join(str(part) for part in parts)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("year", 1, year)
+        dbapi_connection.create_function("week", 1, week)
+        dbapi_connection.create_function("date_format", 2, date_format)
+        dbapi_connection.create_function("concat", -1, concat)
+
+    # database.py connects at import (create_all); pooled connections from before this call lack the functions
+    engine.dispose()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+"""
+Endpoint benchmarks: build (or reuse) a synthetic SQLite database, drive every router in main.py
+in-process through the ASGI app, and report latency percentiles, throughput and SQL statements per
+request for each endpoint as JSON.
+
+    python3 benchmarks/run.py --products 1000 --sales 10000000 --history 1000000 --output results.json
+    python3 benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python3 benchmarks/run.py --baseline benchmarks/baseline.json   # exit 1 on regressions
+
+The database is cached by scale and seed, so only the first run at a given scale pays for seeding.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import datetime
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint against a synthetic SQLite dataset.")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--sales", type=int, default=100000)
+    parser.add_argument("--history", type=int, default=50000, help="inventory history rows")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=0, help="processes generating rows when the dataset is built")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--only", help="comma separated endpoint names to run")
+    parser.add_argument("--db", help="SQLite file to use (default: cached per scale and seed in the temp directory)")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="results JSON to compare against; exit 1 on regressions")
+    parser.add_argument("--save-baseline", help="also write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown of p95 and throughput")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore p95 slowdowns smaller than this")
+    return parser.parse_args()
+
+
+args = parse_args()
+scale_args = dict(categories=args.categories, products=args.products, users=args.users, sales=args.sales, history=args.history)
+db_path = args.db or os.path.join(tempfile.gettempdir(), "ecommerce-bench-{categories}-{products}-{users}-{sales}-{history}".format(**scale_args) + f"-s{args.seed}.db")
+fresh = not os.path.exists(db_path)
+os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import httpx
+import sqlalchemy
+from sqlalchemy import event
+
+from database import engine, get_async_engine
+from benchmarks.dataset import ADMIN_PASSWORD, ADMIN_USERNAME, END_DATE, Scale, build_dataset, register_mysql_functions
+
+scale = Scale(**scale_args)
+register_mysql_functions(engine)
+register_mysql_functions(get_async_engine().sync_engine)
+if fresh:
+    started = time.perf_counter()
+    print(f"building {db_path} ...", file=sys.stderr)
+    build_dataset(engine, scale, args.seed, args.workers, log=lambda line: print(line, file=sys.stderr))
+    print(f"built in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+from main import app
+from app.api.endpoints import category, inventory, metrics, products, sales, users
+
+# The routers main.py includes
+ROUTERS = (users.router, category.router, products.router, sales.router, inventory.router, metrics.router)
+
+# Routes left out on purpose: writes that would change the dataset from one run to the next, and the
+# low-stock SSE stream, which never completes
+NOT_DRIVEN = {
+    ("POST", "/Create_User/"), ("PUT", "/Update_User/{user_id}"), ("DELETE", "/Delete_User/{user_id}"),
+    ("POST", "/Create_Role/"), ("PUT", "/Update_Role/{role_id}"), ("DELETE", "/Delete_Role/{role_id}"),
+    ("POST", "/Assign_Role/{user_id}/role/{role_id}"), ("PUT", "/users/{user_id}/roles/{role_id}"), ("DELETE", "/users/{user_id}/roles/{role_id}"),
+    ("POST", "/categories/categories/"), ("PUT", "/categories/categories/{category_id}"), ("DELETE", "/categories/categories/{category_id}"),
+    ("POST", "/products/"), ("PUT", "/products/products/{product_id}"), ("DELETE", "/products/products/{product_id}"),
+    ("POST", "/inventory/"), ("DELETE", "/inventory/{product_id}"),
+    ("GET", "/inventory/low-stock/stream"),
+}
+
+
+class Endpoint(NamedTuple):
+    name: str
+    method: str
+    path: str
+    params: Optional[Dict] = None
+    body: Optional[Dict] = None
+
+
+def endpoints(token: str) -> List[Endpoint]:
+    """
+    One entry per route in main.py's routers except those in NOT_DRIVEN, with arguments that hit real
+    rows of the dataset. undriven_routes() reports a route added without an entry here.
+    """
+    pid = scale.products // 2 or 1
+    month = {"start": (END_DATE - datetime.timedelta(days=30)).isoformat(), "end": END_DATE.isoformat()}
+    year = {"start": (END_DATE - datetime.timedelta(days=364)).isoformat(), "end": END_DATE.isoformat()}
+    last_year = [
+        f"{END_DATE - datetime.timedelta(days=394)},{END_DATE - datetime.timedelta(days=365)}",
+        f"{month['start']},{month['end']}",
+    ]
+    return [
+        Endpoint("auth.login", "POST", "/login", body={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}),
+        Endpoint("users.list", "GET", "/Get_All_Users/"),
+        Endpoint("users.get", "GET", "/Get_User/1"),
+        Endpoint("users.roles", "GET", "/users/1/roles"),
+        Endpoint("users.role", "GET", "/users/1/roles/1"),
+        Endpoint("roles.list", "GET", "/Get_All_Roles/"),
+        Endpoint("roles.get", "GET", "/Get_Role/1"),
+        Endpoint("categories.list", "GET", "/categories/categories/"),
+        Endpoint("categories.get", "GET", "/categories/categories/1"),
+        Endpoint("products.list", "GET", "/products/"),
+        Endpoint("products.get", "GET", f"/products/{pid}"),
+        Endpoint("products.by_category", "GET", "/products/category/1"),
+        Endpoint("sales.create", "POST", "/sales/", body={"product_id": pid, "sale_date": END_DATE.isoformat(), "quantity": 1, "total_amount": 10.0, "token": token}),
+        Endpoint("sales.bulk", "POST", "/sales/bulk", body={"token": token, "sales": [
+            {"product_id": 1 + (pid + i) % scale.products, "sale_date": (END_DATE - datetime.timedelta(days=i % 7)).isoformat(), "quantity": 1 + i % 3, "total_amount": 10.0 * (1 + i % 3)}
+            for i in range(100)
+        ]}),
+        Endpoint("sales.list", "GET", "/sales/"),
+        Endpoint("sales.get", "GET", "/sales/1"),
+        Endpoint("sales.revenue_day", "GET", "/sales/revenue/", params=dict(month, period="day")),
+        Endpoint("sales.revenue_month", "GET", "/sales/revenue/", params=dict(year, period="month")),
+        Endpoint("sales.revenue_series", "GET", "/sales/revenue/series", params=dict(year, period="day", rolling=28, cumulative="true", yoy="true")),
+        Endpoint("sales.revenue_compare", "GET", "/sales/revenue/compare", params={"interval": last_year[1], "baseline": last_year[0]}),
+        Endpoint("sales.revenue_category", "GET", "/sales/revenue/category", params=month),
+        Endpoint("sales.top_window", "GET", "/sales/top", params={"by": "revenue", "n": 10, "window": "30d"}),
+        Endpoint("sales.top_range", "GET", "/sales/top", params=dict(month, by="units", n=10, group="category")),
+        Endpoint("sales.distribution", "GET", "/sales/distribution", params=year),
+        Endpoint("sales.distribution_day", "GET", "/sales/distribution", params=dict(month, group="day")),
+        Endpoint("sales.range", "GET", "/sales/range/", params=month),
+        Endpoint("sales.product", "GET", "/sales/product/", params=dict(year, product_id=pid)),
+        Endpoint("sales.category", "GET", "/sales/category/", params=dict(year, category_id=1)),
+        Endpoint("inventory.list", "GET", "/inventory/"),
+        Endpoint("inventory.low_stock", "GET", "/inventory/low-stock"),
+        Endpoint("inventory.get", "GET", f"/inventory/{pid}"),
+        Endpoint("inventory.adjust", "PUT", f"/inventory/{pid}", params={"change_qty": 1, "reason": "bench"}),
+        Endpoint("inventory.as_of", "GET", "/inventory/as-of", params={"ts": datetime.datetime.combine(END_DATE - datetime.timedelta(days=45), datetime.time()).isoformat()}),
+        Endpoint("inventory.history", "GET", "/inventory/history/"),
+        Endpoint("inventory.history_product", "GET", f"/inventory/history/{pid}"),
+        Endpoint("metrics.prometheus", "GET", "/metrics"),
+        Endpoint("metrics.db_pool", "GET", "/metrics/db-pool"),
+        Endpoint("metrics.auth_cache", "GET", "/metrics/auth-cache"),
+        Endpoint("metrics.catalog_cache", "GET", "/metrics/catalog-cache"),
+        Endpoint("metrics.sales_engine", "GET", "/metrics/sales-engine"),
+        Endpoint("metrics.leaderboards", "GET", "/metrics/leaderboards"),
+    ]
+
+
+def undriven_routes(driven: List[Endpoint]) -> List[str]:
+    """
+    Returns "METHOD /path" for every route that no entry of driven requests and NOT_DRIVEN does not list.
+    """
+    missing = []
+    for router in ROUTERS:
+        for route in router.routes:
+            for method in sorted(route.methods - {"HEAD"}):
+                if (method, route.path) in NOT_DRIVEN:
+                    continue
+                if not any(endpoint.method == method and route.path_regex.match(endpoint.path) for endpoint in driven):
+                    missing.append(f"{method} {route.path}")
+    return missing
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        for target in (engine, get_async_engine().sync_engine):
+            event.listen(target, "before_cursor_execute", self.before_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+async def drive(client: httpx.AsyncClient, endpoint: Endpoint, counter: QueryCounter) -> Dict:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def one(timed: bool):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(endpoint.method, endpoint.path, params=endpoint.params, json=endpoint.body)
+            if timed:
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status_code] += 1
+
+    await asyncio.gather(*(one(False) for _ in range(args.warmup)))
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(one(True) for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "queries_per_request": round((counter.count - queries_before) / len(latencies), 2),
+        "errors": sum(n for code, n in statuses.items() if code >= 400),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+async def run() -> Dict:
+    counter = QueryCounter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        login = await client.post("/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+        login.raise_for_status()
+        selected = set(args.only.split(",")) if args.only else None
+        results = {}
+        driven = endpoints(login.json()["access_token"])
+        for route in undriven_routes(driven):
+            print(f"not benchmarked: {route} (add it to endpoints() or NOT_DRIVEN)", file=sys.stderr)
+        for endpoint in driven:
+            if selected is not None and endpoint.name not in selected:
+                continue
+            results[endpoint.name] = await drive(client, endpoint, counter)
+            row = results[endpoint.name]
+            print(f"{endpoint.name:28} p50 {row['p50_ms']:8.2f} ms  p95 {row['p95_ms']:8.2f} ms  p99 {row['p99_ms']:8.2f} ms  "
+                  f"{row['throughput_rps']:8.1f} req/s  {row['queries_per_request']:5.2f} q/req  errors {row['errors']}", file=sys.stderr)
+    return {
+        "meta": {
+            "scale": scale._asdict(),
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "machine": platform.machine(),
+        },
+        "endpoints": results,
+    }
+
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """
+    Returns a description of every regression of results against baseline.
+    """
+    regressions = []
+    if results["meta"]["scale"] != baseline["meta"]["scale"]:
+        regressions.append("scale differs from the baseline; numbers are not comparable")
+    for name, base in baseline["endpoints"].items():
+        current = results["endpoints"].get(name)
+        if current is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + args.tolerance) and current["p95_ms"] - base["p95_ms"] > args.min_delta_ms:
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - args.tolerance):
+            regressions.append(f"{name}: throughput {base['throughput_rps']:.1f} -> {current['throughput_rps']:.1f} req/s")
+        if current["queries_per_request"] > base["queries_per_request"] + 0.01:
+            regressions.append(f"{name}: queries per request {base['queries_per_request']} -> {current['queries_per_request']}")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    results = asyncio.run(run())
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("no regressions against the baseline", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
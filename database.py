@@ -1,15 +1,87 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from typing import Optional
 import os
 
+from app.crud.metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, async_pool_metrics, pool_metrics, route_metrics
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# Async driver used for each sync backend when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+def _pool_options(url: str) -> dict:
+    if make_url(url).database in (None, "", ":memory:"):
+        # In-memory SQLite must keep its single connection; leave SQLAlchemy's default pool alone
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def _async_url(url: str) -> Optional[str]:
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return None
+    return sync_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+sync_pool_options = _pool_options(DATABASE_URL)
+if sync_pool_options:
+    sync_pool_options["poolclass"] = InstrumentedQueuePool
+engine = create_engine(DATABASE_URL, **sync_pool_options)
+pool_metrics.install(engine)
+route_metrics.install(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+_async_engine = None
+_async_session_factory = None
+
+def get_async_engine() -> AsyncEngine:
+    """
+    The async engine is created on first use, so the async driver is only needed
+    when an async route is actually called.
+    """
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        if ASYNC_DATABASE_URL is None:
+            raise RuntimeError("No async driver known for DATABASE_URL; set ASYNC_DATABASE_URL")
+        async_pool_options = _pool_options(ASYNC_DATABASE_URL)
+        if async_pool_options:
+            async_pool_options["poolclass"] = InstrumentedAsyncQueuePool
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_pool_options)
+        async_pool_metrics.install(_async_engine.sync_engine)
+        route_metrics.install(_async_engine.sync_engine)
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+def async_pool():
+    """
+    The async engine's pool, or None until the first async route has created the engine.
+    """
+    return _async_engine.sync_engine.pool if _async_engine is not None else None
+
+def AsyncSessionLocal() -> AsyncSession:
+    """
+    Async counterpart of SessionLocal.
+    """
+    get_async_engine()
+    return _async_session_factory()
+
 from app.models import models
 models.Base.metadata.create_all(bind=engine)
-
@@ -1,15 +1,34 @@
-from fastapi import FastAPI
-from database import engine
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from database import SessionLocal, engine
 from app.models.models import Base
-from app.api.endpoints import products, sales, inventory, category, users
+from app.api.endpoints import products, sales, inventory, category, users, metrics
+from app.api.middleware import SQLTimingMiddleware
+from app.crud.password_pool import PasswordPoolBusy, password_pool
+from app.crud.sales_engine import SALES_ENGINE, sales_engine
 
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="E-commerce Admin API")
+app.add_middleware(SQLTimingMiddleware)
+
+@app.exception_handler(PasswordPoolBusy)
+def password_pool_busy(request: Request, exc: PasswordPoolBusy):
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": "Authentication is busy, try again shortly"}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+def start_sales_engine():
+    if SALES_ENGINE:
+        sales_engine.start(SessionLocal)
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    password_pool.shutdown()
 
 app.include_router(users.router)
 app.include_router(category.router)
 app.include_router(products.router)
 app.include_router(sales.router)
 app.include_router(inventory.router)
+app.include_router(metrics.router)
 
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+import os
+import sys
+import argparse
+import datetime
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from database import SessionLocal, engine
+from app.models.models import Base
+from app.crud.history_archive import HISTORY_RETENTION_DAYS, history_archive, retention_cutoff
+from app.crud.inventory_crud import archive_inventory_history
+
+Base.metadata.create_all(bind=engine)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Move old inventory history into compressed daily archive files.")
+    parser.add_argument("--retention-days", type=int, default=HISTORY_RETENTION_DAYS, help="days of history kept in the database")
+    parser.add_argument("--before", type=datetime.date.fromisoformat, help="archive every day before this one instead (YYYY-MM-DD)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    before = args.before or retention_cutoff(args.retention_days)
+    db = SessionLocal()
+    try:
+        rows, days = archive_inventory_history(db, before)
+        print(f"{rows} history rows from {days} days before {before} archived to {history_archive.root}.")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Run EXPLAIN on every read query issued by the CRUD layer and report the ones that scan a table
+without an index. Also reports indexes declared in app/models that are missing from the live
+database (create_all does not add indexes to tables that already exist).
+
+A scan is reported when the table is filtered (the statement has a WHERE clause) or is the inner
+side of a join; an unfiltered scan of the driving table, e.g. a first page ordered by id, is expected.
+
+Exit code is 1 when anything is reported, so the script can gate CI.
+"""
+import os
+import sys
+import argparse
+import datetime
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import event, inspect
+
+from database import SessionLocal, engine
+from app.models.models import Base
+from app.crud import category_crud, inventory_crud, product_crud, sale_crud, user_crud
+from app.crud.pagination import encode_cursor
+
+today = datetime.date.today()
+month_ago = today - datetime.timedelta(days=30)
+cursor_id = encode_cursor(1, 1)
+cursor_name = encode_cursor("m", 1)
+cursor_day = encode_cursor(month_ago, 1)
+cursor_time = encode_cursor(datetime.datetime.utcnow(), 1)
+
+CRUD_READS = [
+    ("category_crud.get_category", lambda db: category_crud.get_category(db, 1)),
+    ("category_crud.list_categories", lambda db: category_crud.list_categories(db, cursor_id)),
+    ("product_crud.get_product", lambda db: product_crud.get_product(db, 1)),
+    ("product_crud.get_product_by_category", lambda db: product_crud.get_product_by_category(db, 1, cursor_id)),
+    ("product_crud.list_products", lambda db: product_crud.list_products(db, cursor_id)),
+    ("user_crud.get_user", lambda db: user_crud.get_user(db, 1)),
+    ("user_crud.get_user_by_username", lambda db: user_crud.get_user_by_username(db, "admin")),
+    ("user_crud.list_users", lambda db: user_crud.list_users(db, cursor_id)),
+    ("user_crud.get_role", lambda db: user_crud.get_role(db, 1)),
+    ("user_crud.list_roles", lambda db: user_crud.list_roles(db, cursor_id)),
+    ("user_crud.get_user_role", lambda db: user_crud.get_user_role(db, 1, 1)),
+    ("user_crud.get_user_roles", lambda db: user_crud.get_user_roles(db, 1)),
+    ("sale_crud.get_sale", lambda db: sale_crud.get_sale(db, 1)),
+    ("sale_crud.list_sales", lambda db: sale_crud.list_sales(db, cursor_name)),
+    ("sale_crud.revenue_by_period", lambda db: sale_crud.revenue_by_period(db, "month", month_ago, today)),
+    ("sale_crud.revenue_comparison", lambda db: sale_crud.revenue_comparison(db, [(month_ago, today), (month_ago - datetime.timedelta(days=365), today - datetime.timedelta(days=365))])),
+    ("sale_crud.sales_by_period_category", lambda db: sale_crud.sales_by_period_category(db, month_ago, today)),
+    ("sale_crud.get_sales_by_date_range", lambda db: sale_crud.get_sales_by_date_range(db, month_ago, today, cursor_day)),
+    ("sale_crud.get_sales_by_product", lambda db: sale_crud.get_sales_by_product(db, month_ago, today, 1)),
+    ("sale_crud.get_sales_by_category", lambda db: sale_crud.get_sales_by_category(db, month_ago, today, 1)),
+    ("inventory_crud.get_inventory", lambda db: inventory_crud.get_inventory(db, 1)),
+    ("inventory_crud.list_inventory", lambda db: inventory_crud.list_inventory(db, cursor_id)),
+    ("inventory_crud.list_low_stock", lambda db: inventory_crud.list_low_stock(db, cursor_id)),
+    ("inventory_crud.list_inventory_history", lambda db: inventory_crud.list_inventory_history(db, cursor_time)),
+    ("inventory_crud.get_inventory_history", lambda db: inventory_crud.get_inventory_history(db, 1, cursor_time)),
+]
+
+
+def capture_statements(fn):
+    """
+    Returns the (statement, parameters) pairs fn sends to the database, inside a rolled back transaction.
+    """
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = SessionLocal()
+    try:
+        fn(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        db.rollback()
+        db.close()
+    return captured
+
+
+def full_scans(conn, statement, parameters):
+    """
+    Returns the tables EXPLAIN says are read without an index, in plan order.
+    """
+    if engine.dialect.name == "sqlite":
+        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        scans = []
+        for row in plan:
+            detail = row[-1]
+            if detail.startswith("SCAN") and "INDEX" not in detail and "SUBQUERY" not in detail:
+                scans.append(detail.split()[1])
+            elif detail.startswith(("SCAN", "SEARCH")):
+                scans.append(None)
+        return scans
+    plan = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+    return [row["table"] if row["type"] == "ALL" else None for row in plan]
+
+
+def audit_queries():
+    problems = []
+    for name, fn in CRUD_READS:
+        try:
+            statements = capture_statements(fn)
+        except Exception as exc:
+            problems.append(f"{name}: query failed on {engine.dialect.name} ({exc.__class__.__name__})")
+            continue
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                scans = full_scans(conn, statement, parameters)
+                filtered = " WHERE " in statement.upper().replace("\n", " ")
+                for position, table in enumerate(scans):
+                    if table is not None and (filtered or position > 0):
+                        problems.append(f"{name}: full scan of {table}")
+    return problems
+
+
+def missing_indexes(create: bool):
+    problems = []
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if create:
+                index.create(bind=engine)
+                print(f"created index {index.name} on {table.name}")
+            else:
+                problems.append(f"{table.name}: declared index {index.name} is missing")
+    return problems
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Report CRUD queries that are not served by an index.")
+    parser.add_argument("--create-missing", action="store_true", help="create declared indexes missing from the database")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    Base.metadata.create_all(bind=engine)
+    problems = missing_indexes(args.create_missing) + audit_queries()
+    for problem in problems:
+        print(problem)
+    if problems:
+        print(f"{len(problems)} issue(s) found.")
+        sys.exit(1)
+    print(f"All {len(CRUD_READS)} CRUD reads use an index.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Check /inventory/as-of against a replay of the full history, on a throwaway SQLite database with
+mid-day checkpoints on both sides of the archive boundary. Archived days only keep their net change,
+so inside them only midnights are compared; after the boundary any timestamp is.
+
+    python3 scripts/check_inventory_as_of.py
+"""
+import os
+import sys
+import random
+import tempfile
+import datetime
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+_work_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_work_dir, 'as_of.db')}"
+os.environ["HISTORY_ARCHIVE_DIR"] = os.path.join(_work_dir, "archive")
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+
+from fastapi.testclient import TestClient
+
+from database import SessionLocal
+from app.models.models import Category, Inventory, InventoryHistory, Product
+from app.crud.inventory_crud import archive_inventory_history, take_inventory_checkpoint
+from main import app
+
+PRODUCTS = 8
+START = datetime.datetime(2025, 1, 1)
+DAYS = 60
+ARCHIVE_BEFORE = datetime.date(2025, 2, 1)
+
+
+def seed(rng):
+    """
+    Product 1 is the reported case: 100 in stock, -10 at 01:00 and -20 at 05:00 on Jan 5, -5 on Jan 6
+    and a checkpoint at Jan 5 02:00. The other products get random changes and checkpoints.
+    Returns every change as (product_id, changed_at, change_qty).
+    """
+    opened = START - datetime.timedelta(hours=1)
+    changes = [
+        (1, opened, 100),
+        (1, datetime.datetime(2025, 1, 5, 1), -10),
+        (1, datetime.datetime(2025, 1, 5, 5), -20),
+        (1, datetime.datetime(2025, 1, 6, 12), -5),
+    ]
+    for product_id in range(2, PRODUCTS + 1):
+        changes.append((product_id, opened, rng.randint(50, 200)))
+        for _ in range(40):
+            # Never exactly at midnight, where a change would be on both sides of a compared moment
+            changes.append((product_id, START + datetime.timedelta(seconds=rng.randint(0, DAYS * 86400 - 2) | 1), rng.randint(-10, 10)))
+
+    db = SessionLocal()
+    try:
+        db.add(Category(id=1, name="Category 1"))
+        db.add_all([Product(id=i, name=f"Product {i}", category_id=1, unit_price=9.99) for i in range(1, PRODUCTS + 1)])
+        checkpoints = [datetime.datetime(2025, 1, 5, 2)]
+        checkpoints += [START + datetime.timedelta(seconds=rng.randint(3600, DAYS * 86400)) for _ in range(6)]
+        # Inventory starts empty and each checkpoint sees exactly the changes before it
+        stock = {product_id: 0 for product_id in range(1, PRODUCTS + 1)}
+        db.add_all([Inventory(product_id=product_id, quantity_on_hand=0, low_stock_threshold=10) for product_id in stock])
+        db.flush()
+        pending = sorted(changes, key=lambda change: change[1])
+        for taken_at in sorted(checkpoints) + [None]:
+            while pending and (taken_at is None or pending[0][1] <= taken_at):
+                product_id, changed_at, change_qty = pending.pop(0)
+                stock[product_id] += change_qty
+                db.add(InventoryHistory(product_id=product_id, change_qty=change_qty, reason="check", changed_at=changed_at))
+            for inv in db.query(Inventory):
+                inv.quantity_on_hand = stock[inv.product_id]
+            db.commit()
+            if taken_at is not None:
+                take_inventory_checkpoint(db, taken_at)
+        archive_inventory_history(db, ARCHIVE_BEFORE)
+    finally:
+        db.close()
+    return changes
+
+
+def replay(changes, ts):
+    stock = {}
+    for product_id, changed_at, change_qty in changes:
+        if changed_at <= ts:
+            stock[product_id] = stock.get(product_id, 0) + change_qty
+    return stock
+
+
+def main():
+    rng = random.Random(7)
+    changes = seed(rng)
+    client = TestClient(app)
+    moments = [START + datetime.timedelta(days=day) for day in range(DAYS + 2)]
+    boundary = datetime.datetime.combine(ARCHIVE_BEFORE, datetime.time())
+    moments += [boundary + datetime.timedelta(seconds=rng.randint(0, (DAYS - 31) * 86400)) for _ in range(30)]
+
+    failures = 0
+    for ts in sorted(moments):
+        response = client.get("/inventory/as-of", params={"ts": ts.isoformat(), "limit": 500})
+        response.raise_for_status()
+        got = {row["product_id"]: row["quantity_on_hand"] for row in response.json()}
+        expected = replay(changes, ts)
+        wrong = {product_id: (got.get(product_id), qty) for product_id, qty in expected.items() if got.get(product_id) != qty}
+        if wrong:
+            failures += 1
+            print(f"FAIL {ts.isoformat()}: (returned, replayed) {wrong}")
+    print(f"{len(moments) - failures} of {len(moments)} timestamps match the replayed history.")
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Guard against N+1 loading: call every list endpoint through the ASGI app with a small and a large
+page size against a throwaway SQLite database, count the SQL statements each request issues,
+and fail if the count grows with the page size.
+
+    python3 scripts/check_query_counts.py
+"""
+import os
+import sys
+import tempfile
+import datetime
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'query_counts.db')}"
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from database import SessionLocal, engine, get_async_engine
+from app.models.models import Category, Inventory, InventoryHistory, Product, Role, Sale, User, UserRole
+from app.crud.sale_crud import rebuild_sales_rollup
+from main import app
+
+ROWS = 60
+SMALL_PAGE = 5
+LARGE_PAGE = 50
+START = datetime.date(2025, 1, 1)
+
+LIST_ENDPOINTS = [
+    ("/categories/categories/", {}),
+    ("/products/", {}),
+    ("/products/category/1", {}),
+    ("/Get_All_Users/", {}),
+    ("/Get_All_Roles/", {}),
+    ("/sales/", {}),
+    ("/sales/range/", {"start": START.isoformat(), "end": (START + datetime.timedelta(days=ROWS)).isoformat()}),
+    ("/inventory/", {}),
+    ("/inventory/low-stock", {}),
+    ("/inventory/history/", {}),
+    ("/inventory/history/1", {}),
+]
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        db.add_all([Category(id=i, name=f"Category {i}") for i in range(1, ROWS + 1)])
+        db.add_all([Role(id=i, name=f"role-{i}") for i in range(1, ROWS + 1)])
+        db.add_all([Product(id=i, name=f"Product {i}", category_id=1 if i % 2 else i, unit_price=9.99) for i in range(1, ROWS + 1)])
+        db.add_all([User(id=i, username=f"user{i}", email=f"user{i}@shop.com", password_hash="x") for i in range(1, ROWS + 1)])
+        db.add_all([UserRole(user_id=i, role_id=r) for i in range(1, ROWS + 1) for r in (1 + i % ROWS, 1 + (i + 1) % ROWS)])
+        db.add_all([Inventory(product_id=i, quantity_on_hand=i % 5, low_stock_threshold=10, is_low_stock=True) for i in range(1, ROWS + 1)])
+        db.add_all([InventoryHistory(product_id=1 + i % 2, change_qty=1, reason="seed") for i in range(ROWS)])
+        db.add_all([
+            Sale(product_id=i, sale_date=START + datetime.timedelta(days=i), quantity=1, total_amount=9.99)
+            for i in range(1, ROWS + 1)
+        ])
+        db.commit()
+        rebuild_sales_rollup(db)
+    finally:
+        db.close()
+
+
+def count_queries(client, path, params):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [engine, get_async_engine().sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path, params=params)
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+    response.raise_for_status()
+    return len(statements), len(response.json())
+
+
+def main():
+    seed()
+    client = TestClient(app)
+    failures = 0
+    for path, params in LIST_ENDPOINTS:
+        small, small_rows = count_queries(client, path, dict(params, limit=SMALL_PAGE))
+        large, large_rows = count_queries(client, path, dict(params, limit=LARGE_PAGE))
+        grows = large > small
+        failures += grows
+        print(f"{'FAIL' if grows else 'ok  '} {path}: {small} queries for {small_rows} rows, {large} queries for {large_rows} rows")
+    if failures:
+        print(f"{failures} endpoint(s) issue more queries for larger pages.")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+import os
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from database import SessionLocal, engine
+from app.models.models import Base
+from app.crud.inventory_crud import take_inventory_checkpoint
+
+Base.metadata.create_all(bind=engine)
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = take_inventory_checkpoint(db)
+        print(f"Checkpoint of {rows} inventory rows written.")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+"""
+Generate a reproducible dataset of users, categories, products, inventory, inventory history
+and sales with weekly and yearly seasonality, then build the sales rollup and sketches.
+
+    python3 scripts/generate_data.py --scale small
+    python3 scripts/generate_data.py --scale large --workers 8 --seed 7
+    python3 scripts/generate_data.py --scale medium --sales 3000000 --reset
+
+The same scale, seed and end date always produce the same rows, whatever the number of workers:
+sales and history are generated in fixed-size chunks, each from its own seeded random stream.
+Rows are written with bulk insert() batches; secondary indexes on sales and inventory_history
+are dropped during the load and rebuilt afterwards, except those led by a foreign key column.
+Each product's stock opens with an "initial stock" history row just large enough that it never
+goes negative, and quantity_on_hand is what its history adds up to.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import itertools
+from bisect import bisect_left
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import Index, func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from database import engine
+from app.models.models import Base, Category, Inventory, InventoryHistory, Product, Role, Sale, User, UserRole
+from app.crud.sale_crud import rebuild_sales_rollup, rebuild_sales_sketches
+from app.crud.user_crud import hash_password
+
+CHUNK_SIZE = 50000
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+LOW_STOCK_THRESHOLD = 20
+HISTORY_REASONS = ("sale", "restock", "return", "audit")
+INITIAL_STOCK_REASON = "initial stock"
+
+
+class Scale(NamedTuple):
+    categories: int
+    products: int
+    users: int
+    sales: int
+    history: int
+    days: int = 730
+
+
+SCALES = {
+    "small": Scale(categories=10, products=100, users=10, sales=10000, history=5000),
+    "medium": Scale(categories=20, products=1000, users=100, sales=1000000, history=100000),
+    "large": Scale(categories=50, products=1000, users=1000, sales=10000000, history=1000000),
+}
+
+
+class Catalog(NamedTuple):
+    prices: List[float]
+    categories: List[int]
+    popularity: List[float]
+    days: List[datetime.date]
+    seasonality: List[float]
+
+
+_catalogs: Dict[Tuple, Catalog] = {}
+
+
+def catalog(scale: Scale, seed: int, end_date: datetime.date) -> Catalog:
+    """
+    Returns the product prices, categories, sales popularity and per-day seasonality for (scale, seed).
+    Cheap to recompute, so worker processes derive it rather than receive it.
+    """
+    key = (scale, seed, end_date)
+    if key not in _catalogs:
+        rng = random.Random(f"{seed}-catalog")
+        prices = [round(min(rng.lognormvariate(3.3, 1.0), 2000.0) + 0.99, 2) for _ in range(scale.products)]
+        categories = [1 + rng.randrange(scale.categories) for _ in range(scale.products)]
+        # Zipf-like: a few best sellers and a long tail, in shuffled product order
+        ranks = list(range(1, scale.products + 1))
+        rng.shuffle(ranks)
+        popularity = list(itertools.accumulate(1.0 / rank for rank in ranks))
+        days = [end_date - datetime.timedelta(days=scale.days - 1 - offset) for offset in range(scale.days)]
+        weights = []
+        for offset, day in enumerate(days):
+            weekly = 1.3 if day.weekday() >= 5 else 1.0
+            yearly = {11: 1.3, 12: 1.7, 1: 0.8, 7: 0.9, 8: 0.9}.get(day.month, 1.0)
+            growth = 1.0 + offset / scale.days
+            weights.append(weekly * yearly * growth)
+        _catalogs[key] = Catalog(prices, categories, popularity, days, list(itertools.accumulate(weights)))
+    return _catalogs[key]
+
+
+def _pick(rng: random.Random, cumulative: List[float]) -> int:
+    return bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+def sales_chunk(task: Tuple) -> List[Dict]:
+    scale, seed, end_date, chunk, first_id, count = task
+    cat = catalog(scale, seed, end_date)
+    rng = random.Random(f"{seed}-sales-{chunk}")
+    rows = []
+    for sale_id in range(first_id, first_id + count):
+        product = _pick(rng, cat.popularity)
+        day = cat.days[_pick(rng, cat.seasonality)]
+        quantity = min(10, 1 + int(rng.expovariate(0.6)))
+        rows.append({
+            "id": sale_id,
+            "product_id": product + 1,
+            "sale_date": day,
+            "quantity": quantity,
+            "total_amount": round(cat.prices[product] * quantity, 2),
+            "created_at": datetime.datetime.combine(day, datetime.time(rng.randrange(24), rng.randrange(60))),
+        })
+    return rows
+
+
+def history_chunk(task: Tuple) -> List[Dict]:
+    scale, seed, end_date, chunk, first_id, count = task
+    cat = catalog(scale, seed, end_date)
+    rng = random.Random(f"{seed}-history-{chunk}")
+    rows = []
+    for history_id in range(first_id, first_id + count):
+        reason = rng.choice(HISTORY_REASONS)
+        change = -rng.randint(1, 10) if reason == "sale" else rng.randint(20, 200) if reason == "restock" else rng.randint(-5, 5) or 1
+        day = cat.days[_pick(rng, cat.seasonality)]
+        rows.append({
+            "id": history_id,
+            "product_id": 1 + _pick(rng, cat.popularity),
+            "change_qty": change,
+            "reason": reason,
+            "changed_at": datetime.datetime.combine(day, datetime.time(rng.randrange(24), rng.randrange(60), rng.randrange(60))),
+        })
+    return rows
+
+
+def _tasks(scale: Scale, seed: int, end_date: datetime.date, total: int) -> Iterator[Tuple]:
+    for chunk, first in enumerate(range(0, total, CHUNK_SIZE)):
+        yield (scale, seed, end_date, chunk, first + 1, min(CHUNK_SIZE, total - first))
+
+
+def _generate(worker, tasks: Iterable[Tuple], pool) -> Iterator[List[Dict]]:
+    if pool is None:
+        return map(worker, tasks)
+    return pool.imap(worker, tasks)
+
+
+class StockTracker:
+    """
+    Per product and day net change and total decrease of the history rows passing through track(),
+    enough to find each product's smallest opening stock that never goes negative.
+    """
+    def __init__(self, products: int, days: List[datetime.date]):
+        self.first_day = days[0].toordinal()
+        self.net = np.zeros((products + 1, len(days)), np.int64)
+        self.decreases = np.zeros((products + 1, len(days)), np.int64)
+        self.last_change: Dict[int, datetime.datetime] = {}
+
+    def track(self, batches: Iterable[List[Dict]]) -> Iterator[List[Dict]]:
+        for batch in batches:
+            products = np.fromiter((row["product_id"] for row in batch), np.int64, len(batch))
+            days = np.fromiter((row["changed_at"].toordinal() for row in batch), np.int64, len(batch)) - self.first_day
+            changes = np.fromiter((row["change_qty"] for row in batch), np.int64, len(batch))
+            np.add.at(self.net, (products, days), changes)
+            np.add.at(self.decreases, (products, days), np.minimum(changes, 0))
+            for row in batch:
+                last = self.last_change.get(row["product_id"])
+                if last is None or row["changed_at"] > last:
+                    self.last_change[row["product_id"]] = row["changed_at"]
+            yield batch
+
+    def opening_stock(self, headroom: List[int]) -> List[int]:
+        """
+        Returns, per product from 1, the stock covering its worst point in the tracked history plus headroom.
+        A day's decreases are all counted before its increases, so the order of changes within a day does not matter.
+        """
+        before = np.cumsum(self.net, axis=1) - self.net
+        lowest = np.minimum((before + self.decreases).min(axis=1), 0)
+        return (np.array([0] + headroom) - lowest)[1:].tolist()
+
+    def closing_stock(self, opening: List[int]) -> List[int]:
+        return (np.array(opening) + self.net.sum(axis=1)[1:]).tolist()
+
+
+def _leads_with_foreign_key(index: Index) -> bool:
+    # MySQL refuses to drop the index backing a foreign key (error 1553)
+    return bool(index.expressions[0].foreign_keys)
+
+
+def _load(engine: Engine, table, batches: Iterable[List[Dict]]) -> int:
+    """
+    Insert batches into table with its secondary indexes dropped, then rebuild them. Indexes led by
+    a foreign key column stay, since MySQL needs them for the constraint.
+    """
+    indexes = [index for index in table.__table__.indexes if not _leads_with_foreign_key(index)]
+    for index in indexes:
+        index.drop(bind=engine)
+    written = 0
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        for batch in batches:
+            conn.execute(insert(table), batch)
+            written += len(batch)
+    for index in indexes:
+        index.create(bind=engine)
+    return written
+
+
+def is_empty(engine: Engine) -> bool:
+    with engine.connect() as conn:
+        return all(conn.execute(select(func.count()).select_from(table)).scalar() == 0 for table in (User, Category, Product, Sale))
+
+
+def generate(engine: Engine, scale: Scale, seed: int, end_date: datetime.date, workers: int = 0, log=print) -> None:
+    """
+    Fill an empty database (schema included) with the dataset for (scale, seed, end_date).
+    """
+    Base.metadata.create_all(bind=engine)
+    cat = catalog(scale, seed, end_date)
+    created = datetime.datetime.combine(end_date - datetime.timedelta(days=scale.days), datetime.time())
+    rng = random.Random(f"{seed}-entities")
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(Role), [
+            {"id": 1, "name": "admin", "description": "ecommerce admin"},
+            {"id": 2, "name": "staff", "description": "store staff"},
+        ])
+        staff_hash = hash_password("staff123")
+        conn.execute(insert(User), [{"id": 1, "username": ADMIN_USERNAME, "email": "admin@shop.com", "password_hash": hash_password(ADMIN_PASSWORD), "created_at": created}] + [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@shop.com", "password_hash": staff_hash, "created_at": created}
+            for i in range(2, scale.users + 1)
+        ])
+        conn.execute(insert(UserRole), [{"user_id": 1, "role_id": 1, "assigned_at": created}] + [
+            {"user_id": i, "role_id": 2, "assigned_at": created} for i in range(2, scale.users + 1)
+        ])
+        conn.execute(insert(Category), [
+            {"id": i, "name": f"Category {i}", "description": f"Synthetic category {i}", "created_at": created}
+            for i in range(1, scale.categories + 1)
+        ])
+        conn.execute(insert(Product), [
+            {"id": i + 1, "name": f"Product {i + 1:06d}", "category_id": cat.categories[i], "unit_price": cat.prices[i], "created_at": created, "updated_at": created}
+            for i in range(scale.products)
+        ])
+    log(f"users, roles, {scale.categories} categories and {scale.products} products in {time.perf_counter() - started:.1f}s")
+
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        started = time.perf_counter()
+        written = _load(engine, Sale, _generate(sales_chunk, _tasks(scale, seed, end_date, scale.sales), pool))
+        log(f"{written} sales in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        stock = StockTracker(scale.products, cat.days)
+        written = _load(engine, InventoryHistory, stock.track(_generate(history_chunk, _tasks(scale, seed, end_date, scale.history), pool)))
+        log(f"{written} inventory history rows in {time.perf_counter() - started:.1f}s")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    started = time.perf_counter()
+    opening = stock.opening_stock([rng.randint(0, 500) for _ in range(scale.products)])
+    closing = stock.closing_stock(opening)
+    initial = [
+        {"id": scale.history + i + 1, "product_id": i + 1, "change_qty": qty, "reason": INITIAL_STOCK_REASON, "changed_at": created}
+        for i, qty in enumerate(opening) if qty
+    ]
+    with engine.begin() as conn:
+        # Dated before the first day of history, so stock reconstructed from history starts from it
+        if initial:
+            conn.execute(insert(InventoryHistory), initial)
+        conn.execute(insert(Inventory), [
+            {"id": i + 1, "product_id": i + 1, "quantity_on_hand": qty, "low_stock_threshold": LOW_STOCK_THRESHOLD, "is_low_stock": qty <= LOW_STOCK_THRESHOLD, "last_updated": stock.last_change.get(i + 1, created)}
+            for i, qty in enumerate(closing)
+        ])
+    log(f"initial stock and inventory for {scale.products} products in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    with Session(engine) as db:
+        rows = rebuild_sales_rollup(db)
+    log(f"{rows} sales rollup rows in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    with Session(engine) as db:
+        rows = rebuild_sales_sketches(db)
+    log(f"{rows} sales sketch rows in {time.perf_counter() - started:.1f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a reproducible dataset at a given scale.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small", help="preset row counts; the options below override them")
+    for field in Scale._fields:
+        parser.add_argument(f"--{field}", type=int, help=f"number of {field}" if field != "days" else "days of history ending at --end-date")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=datetime.date.today(), help="last day of generated activity (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=0, help="processes generating rows (0 = inline)")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scale = SCALES[args.scale]._replace(**{field: getattr(args, field) for field in Scale._fields if getattr(args, field) is not None})
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    if not is_empty(engine):
+        print("Database already has data; rerun with --reset to replace it.")
+        sys.exit(1)
+    started = time.perf_counter()
+    generate(engine, scale, args.seed, args.end_date, args.workers)
+    print(f"Generated {scale} with seed {args.seed} in {time.perf_counter() - started:.1f}s. Admin login: {ADMIN_USERNAME} / {ADMIN_PASSWORD}")
+
+if __name__ == '__main__':
+    main()
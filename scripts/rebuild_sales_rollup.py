@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+import os
+import sys
+import argparse
+import datetime
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from database import SessionLocal, engine
+from app.models.models import Base
+from app.crud.sale_crud import rebuild_sales_rollup, rebuild_sales_sketches
+
+Base.metadata.create_all(bind=engine)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rebuild the sales_daily_rollup and sales_daily_sketches tables from raw sales.")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, help="last day to rebuild (YYYY-MM-DD)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        rows = rebuild_sales_rollup(db, args.start, args.end)
+        print(f"{rows} rollup rows written.")
+        rows = rebuild_sales_sketches(db, args.start, args.end)
+        print(f"{rows} sketch rows written.")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
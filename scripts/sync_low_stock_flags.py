@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Bring an existing database up to date with the indexed inventory.is_low_stock flag:
+adds the column and its index when missing, then recomputes every flag that disagrees
+with quantity_on_hand <= low_stock_threshold.
+"""
+import os
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import inspect, text
+
+from database import SessionLocal, engine
+from app.models.models import Base, Inventory
+from app.crud.inventory_crud import sync_low_stock_flags
+
+Base.metadata.create_all(bind=engine)
+
+def ensure_schema():
+    inspector = inspect(engine)
+    if "is_low_stock" not in {col["name"] for col in inspector.get_columns("inventory")}:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE inventory ADD COLUMN is_low_stock BOOLEAN NOT NULL DEFAULT 0"))
+        print("added column inventory.is_low_stock")
+    existing = {ix["name"] for ix in inspect(engine).get_indexes("inventory")}
+    for index in Inventory.__table__.indexes:
+        if index.name not in existing:
+            index.create(bind=engine)
+            print(f"created index {index.name}")
+
+def main():
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        print(f"{sync_low_stock_flags(db)} inventory rows updated.")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
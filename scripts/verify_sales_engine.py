@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Load the in-memory sales engine from the database, check that it answers revenue_by_period,
+sales_by_period_category, get_sales_by_product and get_sales_by_category exactly like SQL over
+random date ranges, and report its memory use and query times next to SQL's.
+
+    python3 scripts/verify_sales_engine.py --checks 200
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+from decimal import Decimal
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import func, select
+
+from database import SessionLocal, engine
+from app.models.models import Base, Category, Product, Sale
+from app.crud.sale_crud import get_sales_by_category, get_sales_by_product, revenue_by_period, sales_by_period_category
+from app.crud.sales_engine import ENGINE_PERIODS, SalesEngine
+from benchmarks.dataset import register_mysql_functions
+
+Base.metadata.create_all(bind=engine)
+if engine.dialect.name == "sqlite":
+    register_mysql_functions(engine)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the in-memory sales engine against SQL.")
+    parser.add_argument("--checks", type=int, default=100, help="random date ranges to compare")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def normalize(rows):
+    # SQL sums come back as Decimal and labels as dates on some dialects: compare numbers in cents, the rest as text
+    return sorted(
+        tuple(round(float(value) * 100) if isinstance(value, (int, float, Decimal)) else str(value) for value in row)
+        for row in rows
+    )
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    try:
+        sales_engine = SalesEngine()
+        sales_engine.load(db)
+        stats = sales_engine.stats()
+        print(f"loaded {stats['rows']} rows in {stats['load_seconds']}s: {stats['column_bytes'] / 1e6:.1f} MB, "
+              f"{(stats['bytes_per_million_rows'] or 0) / 1e6:.1f} MB per million rows (+{stats['catalog_bytes']} bytes of catalog)")
+        first, last = db.execute(select(func.min(Sale.sale_date), func.max(Sale.sale_date))).one()
+        if first is None:
+            print("no sales to compare")
+            return
+        products = db.execute(select(Product.id)).scalars().all()
+        categories = db.execute(select(Category.id)).scalars().all()
+
+        timings = {"sql": 0.0, "engine": 0.0}
+        mismatches = 0
+
+        def compare(name, sql_call, engine_call):
+            nonlocal mismatches
+            started = time.perf_counter()
+            expected = sql_call()
+            timings["sql"] += time.perf_counter() - started
+            started = time.perf_counter()
+            actual = engine_call()
+            timings["engine"] += time.perf_counter() - started
+            if normalize(expected) != normalize(actual):
+                mismatches += 1
+                print(f"MISMATCH {name}: sql {expected[:3]}... engine {actual[:3]}...")
+
+        span = (last - first).days
+        for _ in range(args.checks):
+            start = first + datetime.timedelta(days=rng.randint(0, span))
+            end = min(last, start + datetime.timedelta(days=rng.randint(0, 400)))
+            period = rng.choice(ENGINE_PERIODS)
+            product_id, category_id = rng.choice(products), rng.choice(categories)
+            compare(f"revenue_by_period {period} {start}..{end}", lambda: revenue_by_period(db, period, start, end), lambda: sales_engine.revenue_by_period(period, start, end))
+            compare(f"sales_by_period_category {start}..{end}", lambda: sales_by_period_category(db, start, end), lambda: sales_engine.sales_by_period_category(start, end))
+            compare(f"get_sales_by_product {product_id} {start}..{end}", lambda: get_sales_by_product(db, start, end, product_id), lambda: sales_engine.get_sales_by_product(start, end, product_id))
+            compare(f"get_sales_by_category {category_id} {start}..{end}", lambda: get_sales_by_category(db, start, end, category_id), lambda: sales_engine.get_sales_by_category(start, end, category_id))
+
+        queries = args.checks * 4
+        print(f"{queries} queries: SQL {timings['sql'] / queries * 1000:.2f} ms, engine {timings['engine'] / queries * 1000:.3f} ms on average")
+        if mismatches:
+            print(f"{mismatches} results differ from SQL")
+            sys.exit(1)
+        print("engine results match SQL")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()